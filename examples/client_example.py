@@ -7,28 +7,185 @@ and receive real-time physiological data streams.
 """
 
 import socket
+import selectors
 import json
 import time
 import sys
 import argparse
-from typing import Dict, Any
+from operator import itemgetter
+from typing import Dict, Any, Iterator, List, Optional
+
+try:
+    # orjson parses bytes directly and is considerably faster on small objects
+    import orjson
+    _loads = orjson.loads
+    
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    _loads = json.loads
+    
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+# Fields shown per sample, extracted in a single C-level call
+_SAMPLE_FIELDS = itemgetter('timestamp', 'red_ppg', 'ir_ppg', 'heart_rate',
+                            'spO2', 'activity', 'condition')
+
+_HEADER = (f"{'Sample':>6} {'Timestamp':>12} {'Red PPG':>8} {'IR PPG':>8} "
+           f"{'HR':>6} {'SpO2':>5} {'Activity':>12} {'Condition':>12}")
+_SEPARATOR = "-" * 80
+_HEADER_BLOCK = f"{_HEADER}\n{_SEPARATOR}\n"
+_ROW_FMT = "%6d %12.3f %8d %8d %6.1f %5.1f %12s %12s\n"
+
+# Display rows are written to stdout in batches of this many
+_OUTPUT_BATCH = 50
+
+def _enable_quickack(sock: socket.socket) -> bool:
+    """Ask the kernel to ACK immediately (Linux only); returns whether it is supported"""
+    quickack = getattr(socket, 'TCP_QUICKACK', None)
+    if quickack is None:
+        return False
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, quickack, 1)
+        return True
+    except OSError:
+        return False
+
+class NDJsonReader:
+    """
+    Frames newline-delimited JSON records from a non-blocking socket
+    
+    A single receive buffer is kept per socket, so a record split across
+    reads is completed by the next read instead of being lost or corrupted.
+    """
+    
+    def __init__(self, sock: socket.socket, chunk_size: int = 1 << 16):
+        self.sock = sock
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self._quickack = _enable_quickack(sock)
+        
+        # Non-blocking reads driven by the platform selector (epoll/kqueue)
+        sock.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(sock, selectors.EVENT_READ)
+    
+    def __iter__(self) -> Iterator[bytes]:
+        """Yield complete records until the connection is closed"""
+        while True:
+            try:
+                frames = self.read_frames(None)
+            except ConnectionError:
+                return
+            yield from frames
+    
+    def read_frames(self, timeout: Optional[float]) -> List[bytes]:
+        """
+        Wait for data and return all complete records
+        
+        The socket is drained until it would block, so everything the kernel
+        has buffered is consumed in one wake-up. A trailing partial record is
+        kept for the next call.
+        
+        Args:
+            timeout: Maximum time to wait for data in seconds (None blocks)
+            
+        Returns:
+            List of raw records (without the trailing newline)
+        """
+        if not self._selector.select(timeout):
+            return []
+        
+        buffer = self.buffer
+        closed = False
+        while True:
+            try:
+                chunk = self.sock.recv(self.chunk_size)
+            except BlockingIOError:
+                break
+            if not chunk:
+                closed = True
+                break
+            buffer += chunk
+        
+        if self._quickack:
+            # Linux clears TCP_QUICKACK after use; re-arm once per drain
+            _enable_quickack(self.sock)
+        
+        end = buffer.rfind(b'\n')
+        if end == -1:
+            if closed:
+                raise ConnectionError("Server closed the connection")
+            return []
+        
+        frames = bytes(buffer[:end]).split(b'\n')
+        del buffer[:end + 1]
+        return frames
+    
+    def send_all(self, data: bytes):
+        """
+        Send data in full on the non-blocking socket
+        
+        Waits for write readiness whenever the kernel send buffer is full,
+        so a frame is never left half-written on the wire.
+        
+        Args:
+            data: Bytes to send
+        """
+        view = memoryview(data)
+        while view:
+            try:
+                sent = self.sock.send(view)
+            except BlockingIOError:
+                self._selector.modify(self.sock, selectors.EVENT_WRITE)
+                try:
+                    self._selector.select()
+                finally:
+                    self._selector.modify(self.sock, selectors.EVENT_READ)
+                continue
+            view = view[sent:]
+    
+    def close(self):
+        """Release the selector; the socket is owned by the caller"""
+        self._selector.close()
+        self.buffer.clear()
 
 class MAX30102Client:
     """
     Example client for connecting to MAX30102 Simulator TCP server
     """
     
+    # Pre-encoded frames for commands with a fixed shape
+    _STATUS_CMD = b'{"command":"get_status"}\n'
+    _RESET_CMD = b'{"command":"reset"}\n'
+    _SCENARIO_TEMPLATE = '{{"command":"set_scenario","scenario":{}}}\n'
+    
     def __init__(self, host: str = 'localhost', port: int = 8888):
         self.host = host
         self.port = port
         self.socket = None
+        self.reader = None
+        self._out_buf = []
         self.connected = False
         
+        # Message type -> display handler
+        self._handlers = {
+            'welcome': self._on_welcome,
+            'error': self._on_response,
+            'command_response': self._on_response,
+        }
+        
     def connect(self) -> bool:
         """Connect to the MAX30102 simulator server"""
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
             self.socket.connect((self.host, self.port))
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            
+            # One framing buffer per connection, kept across scenarios
+            self.reader = NDJsonReader(self.socket)
             self.connected = True
             print(f"Connected to MAX30102 simulator at {self.host}:{self.port}")
             return True
@@ -38,6 +195,10 @@ class MAX30102Client:
     
     def disconnect(self):
         """Disconnect from the server"""
+        self._flush_output()
+        if self.reader:
+            self.reader.close()
+            self.reader = None
         if self.socket:
             self.socket.close()
         self.connected = False
@@ -62,52 +223,81 @@ class MAX30102Client:
         print("-" * 80)
         
         try:
-            while time.time() - start_time < duration:
-                # Receive data line
-                data_line = self.socket.recv(1024).decode('utf-8').strip()
-                if not data_line:
-                    continue
+            handlers = self._handlers
+            display_sample = self._display_sample
+            for data in self.iter_samples(time.monotonic() + duration):
+                sample_count += 1
                 
-                try:
-                    data = json.loads(data_line)
-                    sample_count += 1
-                    
-                    # Display data
-                    if data.get('type') == 'welcome':
-                        print(f"Welcome message: {data.get('message')}")
-                        print(f"Current config: {json.dumps(data.get('config', {}), indent=2)}")
-                    elif data.get('type') in ['error', 'command_response']:
-                        print(f"Server response: {data}")
-                    else:
-                        # Regular data sample
-                        self._display_sample(data, sample_count)
-                        
-                except json.JSONDecodeError:
-                    print(f"Invalid JSON received: {data_line}")
-                    
+                # Display data; anything without a known type is a data sample
+                handlers.get(data.get('type'), display_sample)(data, sample_count)
+            
+            self._flush_output()
         except KeyboardInterrupt:
+            self._flush_output()
             print("\nStopped by user")
         except Exception as e:
+            self._flush_output()
             print(f"Error receiving data: {e}")
         
         print(f"\nReceived {sample_count} samples in {time.time() - start_time:.2f} seconds")
     
+    def iter_samples(self, deadline: float) -> Iterator[Dict[str, Any]]:
+        """
+        Yield decoded messages from the server until a deadline
+        
+        Args:
+            deadline: time.monotonic() value at which to stop
+            
+        Yields:
+            Decoded JSON messages (data samples and server responses)
+        """
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            
+            for frame in self.reader.read_frames(remaining):
+                if not frame:
+                    continue  # Blank line; the decoder tolerates surrounding whitespace
+                try:
+                    yield _loads(frame)
+                except json.JSONDecodeError:
+                    print(f"Invalid JSON received: {frame!r}")
+    
+    def _on_welcome(self, data: Dict[str, Any], sample_count: int):
+        """Display the server welcome message"""
+        self._flush_output()
+        print(f"Welcome message: {data.get('message')}")
+        print(f"Current config: {json.dumps(data.get('config', {}), indent=2)}")
+    
+    def _on_response(self, data: Dict[str, Any], sample_count: int):
+        """Display a command response or error from the server"""
+        self._flush_output()
+        print(f"Server response: {data}")
+    
     def _display_sample(self, data: Dict[str, Any], sample_count: int):
         """Display a single data sample in a formatted way"""
-        if sample_count % 50 == 1:  # Header every 50 samples
-            print(f"{'Sample':>6} {'Timestamp':>12} {'Red PPG':>8} {'IR PPG':>8} {'HR':>6} {'SpO2':>5} {'Activity':>12} {'Condition':>12}")
-            print("-" * 80)
+        try:
+            timestamp, red_ppg, ir_ppg, heart_rate, spo2, activity, condition = _SAMPLE_FIELDS(data)
+        except KeyError:
+            return  # Not a complete data sample
         
-        timestamp = data.get('timestamp', 0)
-        red_ppg = data.get('red_ppg', 0)
-        ir_ppg = data.get('ir_ppg', 0)
-        heart_rate = data.get('heart_rate', 0)
-        spo2 = data.get('spO2', 0)
-        activity = data.get('activity', 'unknown')
-        condition = data.get('condition', 'normal')
+        out = self._out_buf
+        if sample_count % 50 == 1:  # Header every 50 samples
+            self._flush_output()
+            out.append(_HEADER_BLOCK)
         
-        print(f"{sample_count:6d} {timestamp:12.3f} {red_ppg:8d} {ir_ppg:8d} "
-              f"{heart_rate:6.1f} {spo2:5.1f} {activity:>12} {condition:>12}")
+        out.append(_ROW_FMT % (sample_count, timestamp, red_ppg, ir_ppg,
+                               heart_rate, spo2, activity, condition))
+        if len(out) >= _OUTPUT_BATCH:
+            self._flush_output()
+    
+    def _flush_output(self):
+        """Write buffered display rows to stdout in a single call"""
+        if self._out_buf:
+            sys.stdout.write(''.join(self._out_buf))
+            sys.stdout.flush()
+            self._out_buf.clear()
     
     def send_command(self, command: Dict[str, Any]) -> bool:
         """
@@ -119,13 +309,17 @@ class MAX30102Client:
         Returns:
             bool: Success status
         """
+        return self._send_frame(_dumps(command) + b'\n', command)
+    
+    def _send_frame(self, frame: bytes, command: Any) -> bool:
+        """Send an already-encoded, newline-terminated command frame"""
         if not self.connected:
             print("Not connected to server")
             return False
         
         try:
-            command_json = json.dumps(command) + '\n'
-            self.socket.sendall(command_json.encode('utf-8'))
+            # The reader keeps the socket non-blocking; sendall could stop mid-frame
+            self.reader.send_all(frame)
             print(f"Sent command: {command}")
             return True
         except Exception as e:
@@ -142,21 +336,17 @@ class MAX30102Client:
     
     def set_scenario(self, scenario: str):
         """Send scenario change command"""
-        command = {
-            "command": "set_scenario", 
-            "scenario": scenario
-        }
-        return self.send_command(command)
+        # Only the scenario name is serialized; the wrapper is a fixed template
+        frame = self._SCENARIO_TEMPLATE.format(json.dumps(scenario)).encode('utf-8')
+        return self._send_frame(frame, {"command": "set_scenario", "scenario": scenario})
     
     def get_status(self):
         """Request current status"""
-        command = {"command": "get_status"}
-        return self.send_command(command)
+        return self._send_frame(self._STATUS_CMD, {"command": "get_status"})
     
     def reset(self):
         """Reset to default parameters"""
-        command = {"command": "reset"}
-        return self.send_command(command)
+        return self._send_frame(self._RESET_CMD, {"command": "reset"})
 
 def main():
     """Main function for the example client"""
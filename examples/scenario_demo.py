@@ -7,9 +7,12 @@ cycling through them and showing the resulting data patterns.
 """
 
 import time
-import json
+import numpy as np
 from client_example import MAX30102Client
 
+# Approximate server streaming rate, used to size the per-scenario buffers
+EXPECTED_SAMPLE_RATE = 1000
+
 def run_scenario_demo():
     """Run a demonstration of different scenarios"""
     
@@ -45,31 +48,34 @@ def run_scenario_demo():
             if client.set_scenario(scenario):
                 time.sleep(2)  # Wait for scenario to apply
                 
-                # Receive data for this scenario
-                start_time = time.time()
+                # Receive data for this scenario, keeping vitals for summary stats
                 sample_count = 0
+                hr_values = np.empty(duration * EXPECTED_SAMPLE_RATE, dtype=np.float32)
+                spo2_values = np.empty_like(hr_values)
                 
-                while time.time() - start_time < duration:
-                    data_line = client.socket.recv(1024).decode('utf-8').strip()
-                    if not data_line:
-                        continue
-                    
-                    try:
-                        data = json.loads(data_line)
-                        if data.get('type') in [None, 'data']:  # Regular data sample
-                            sample_count += 1
-                            if sample_count % 20 == 1:  # Show sample every 20th
-                                hr = data.get('heart_rate', 0)
-                                spo2 = data.get('spO2', 0)
-                                red_ppg = data.get('red_ppg', 0)
-                                ir_ppg = data.get('ir_ppg', 0)
-                                print(f"Sample {sample_count:3d}: HR={hr:5.1f}bpm, SpO2={spo2:4.1f}%, "
-                                      f"Red={red_ppg:6d}, IR={ir_ppg:6d}")
-                    
-                    except json.JSONDecodeError:
-                        pass
+                for data in client.iter_samples(time.monotonic() + duration):
+                    if data.get('type') in [None, 'data']:  # Regular data sample
+                        hr = data.get('heart_rate', 0)
+                        spo2 = data.get('spO2', 0)
+                        if sample_count == len(hr_values):
+                            hr_values = np.resize(hr_values, 2 * len(hr_values))
+                            spo2_values = np.resize(spo2_values, 2 * len(spo2_values))
+                        hr_values[sample_count] = hr
+                        spo2_values[sample_count] = spo2
+                        sample_count += 1
+                        if sample_count % 20 == 1:  # Show sample every 20th
+                            red_ppg = data.get('red_ppg', 0)
+                            ir_ppg = data.get('ir_ppg', 0)
+                            print(f"Sample {sample_count:3d}: HR={hr:5.1f}bpm, SpO2={spo2:4.1f}%, "
+                                  f"Red={red_ppg:6d}, IR={ir_ppg:6d}")
                 
                 print(f"✅ Completed: {sample_count} samples received")
+                if sample_count:
+                    hr_values = hr_values[:sample_count]
+                    spo2_values = spo2_values[:sample_count]
+                    print(f"📊 HR mean {hr_values.mean():.1f} "
+                          f"(min {hr_values.min():.1f}, max {hr_values.max():.1f}) bpm, "
+                          f"SpO2 mean {spo2_values.mean():.1f}%")
             
             time.sleep(1)  # Brief pause between scenarios
         
@@ -1,11 +1,129 @@
 import json
 import logging
 import os
-from typing import Dict, Any, Optional
-from dataclasses import dataclass, asdict
+import sys
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import attrgetter
+from types import MappingProxyType
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+from dataclasses import dataclass, asdict, fields
 from .scenarios import ScenarioManager
 
-@dataclass
+# Physiological response curves and relationships. These are constant, so they
+# are built once at import time rather than on every model instance/update.
+
+def _max_heart_rate(age: float) -> float:
+    """Max heart rate formula"""
+    return 208 - (0.7 * age)
+
+def _baseline_heart_rate(age: float) -> float:
+    """Resting heart rate, slight decrease with age"""
+    return 72 - (age - 30) * 0.1
+
+def _baseline_respiratory_rate(age: float) -> float:
+    """Resting respiratory rate, slight decrease with age"""
+    return 16 - (age - 30) * 0.02
+
+# Age-based adjustments
+_AGE_FACTORS = MappingProxyType({
+    'heart_rate': _max_heart_rate,
+    'baseline_hr': _baseline_heart_rate,
+    'respiratory_rate': _baseline_respiratory_rate
+})
+
+# Gender adjustments
+_GENDER_FACTORS = MappingProxyType({
+    'male': {'hr_offset': 0, 'amplitude_factor': 1.0},
+    'female': {'hr_offset': 5, 'amplitude_factor': 0.9}  # Slightly higher HR, lower amplitude
+})
+
+# Activity level effects
+_ACTIVITY_EFFECTS = MappingProxyType({
+    'resting': {
+        'heart_rate_factor': 1.0,
+        'respiratory_factor': 1.0,
+        'amplitude_factor': 1.0,
+        'noise_factor': 0.2
+    },
+    'walking': {
+        'heart_rate_factor': 1.3,
+        'respiratory_factor': 1.5,
+        'amplitude_factor': 1.2,
+        'noise_factor': 0.5
+    },
+    'running': {
+        'heart_rate_factor': 1.9,
+        'respiratory_factor': 2.0,
+        'amplitude_factor': 1.5,
+        'noise_factor': 0.8
+    },
+    'sleeping': {
+        'heart_rate_factor': 0.8,
+        'respiratory_factor': 0.6,
+        'amplitude_factor': 0.7,
+        'noise_factor': 0.1
+    },
+    'sex_time': {
+        'heart_rate_factor': 1.8,
+        'respiratory_factor': 1.8,
+        'amplitude_factor': 1.4,
+        'noise_factor': 0.6
+    }
+})
+
+# Fitness level adjustments
+_FITNESS_EFFECTS = MappingProxyType({
+    'athletic': {'hr_factor': 0.8, 'hrv': 'high'},
+    'average': {'hr_factor': 1.0, 'hrv': 'normal'},
+    'sedentary': {'hr_factor': 1.1, 'hrv': 'low'}
+})
+
+# Condition-specific overrides as (state attribute, value) pairs
+_CONDITION_EFFECTS: Dict[str, Tuple[Tuple[str, Any], ...]] = {
+    'heart_attack': (
+        ('heart_rate_bpm', 45),
+        ('spo2_percent', 85),
+        ('respiratory_rate', 8),
+        ('pulse_amplitude_red', 5000),
+        ('pulse_amplitude_ir', 4500),
+        ('noise_level', 0.1),
+        ('pulse_rhythm', 'irregular'),
+        ('pulse_quality', 'weak')
+    ),
+    'extreme_anxiety': (
+        ('heart_rate_bpm', 120),
+        ('spo2_percent', 95),
+        ('respiratory_rate', 25),
+        ('pulse_amplitude_red', 12000),
+        ('pulse_amplitude_ir', 11500),
+        ('noise_level', 0.15),
+        ('heart_rate_variability', 'low')
+    ),
+    'shock': (
+        ('heart_rate_bpm', 140),
+        ('spo2_percent', 82),
+        ('respiratory_rate', 35),
+        ('pulse_amplitude_red', 3000),
+        ('pulse_amplitude_ir', 2800),
+        ('noise_level', 0.25),
+        ('pulse_quality', 'weak')
+    ),
+    'fear': (
+        ('heart_rate_bpm', 110),
+        ('spo2_percent', 96),
+        ('respiratory_rate', 22),
+        ('pulse_amplitude_red', 11000),
+        ('pulse_amplitude_ir', 10500),
+        ('noise_level', 0.12),
+        ('heart_rate_variability', 'very_low')
+    )
+}
+
+# Slotted state instances where supported (Python 3.10+)
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_OPTIONS)
 class PhysiologicalState:
     """Data class representing the current physiological state"""
     age: int = 30
@@ -37,79 +155,84 @@ class PhysiologicalState:
     pulse_rhythm: str = "regular"
     pulse_quality: str = "normal"
 
+# Scenario reduced to (physiological parameter pairs, has description, implied activity)
+ResolvedScenario = Tuple[Tuple[Tuple[str, Any], ...], bool, Optional[str]]
+
+# Keywords that mark a scenario as an activity scenario
+_ACTIVITY_KEYWORDS = ('walking', 'running', 'sleeping', 'sex')
+
+def _activity_for_scenario(scenario_name: str) -> Optional[str]:
+    """Activity implied by a scenario name, or None"""
+    if any(activity in scenario_name for activity in _ACTIVITY_KEYWORDS):
+        return scenario_name.split('_')[0]
+    return None
+
+# Field names and a C-level getter used to refresh the cached state dictionary
+_STATE_FIELD_NAMES = tuple(f.name for f in fields(PhysiologicalState))
+_STATE_FIELDS = frozenset(_STATE_FIELD_NAMES)
+_get_state_values = attrgetter(*_STATE_FIELD_NAMES)
+
 class PhysiologicalModel:
     """
     Models human physiological responses based on parameters like age, gender,
     activity level, and medical conditions. Provides realistic parameter adjustments.
     """
     
+    # Read-only views of the module-level response tables
+    age_factors = _AGE_FACTORS
+    gender_factors = _GENDER_FACTORS
+    activity_effects = _ACTIVITY_EFFECTS
+    fitness_effects = _FITNESS_EFFECTS
+    
     def __init__(self):
         self.state = PhysiologicalState()
+        self._state_dict = asdict(self.state)
+        
+        # Bumped on every state change so consumers can skip re-reading it
+        self.version = 0
+        
+        # Deferred recalculation while inside batch_update()
+        self._batch_depth = 0
+        self._recalc_pending = False
         self.scenario_manager = ScenarioManager()
         self.setup_logging()
         
-        # Physiological response curves and relationships
-        self._setup_physiological_relationships()
+        # Per-instance cache of resolved scenarios, keyed by (name, library version)
+        self._resolve_scenario = lru_cache(maxsize=64)(self._resolve_scenario_uncached)
+        
+        # Scenario name -> implied activity (None if the name implies none),
+        # filled as scenarios are used so the library is not loaded eagerly
+        self._scenario_activity_map: Dict[str, Optional[str]] = {}
     
     def setup_logging(self):
         """Setup logging for the physiological model"""
         self.logger = logging.getLogger('PhysiologicalModel')
     
-    def _setup_physiological_relationships(self):
-        """Initialize physiological response curves and relationships"""
-        # Age-based adjustments
-        self.age_factors = {
-            'heart_rate': lambda age: 208 - (0.7 * age),  # Max heart rate formula
-            'baseline_hr': lambda age: 72 - (age - 30) * 0.1,  # Slight decrease with age
-            'respiratory_rate': lambda age: 16 - (age - 30) * 0.02
-        }
-        
-        # Gender adjustments
-        self.gender_factors = {
-            'male': {'hr_offset': 0, 'amplitude_factor': 1.0},
-            'female': {'hr_offset': 5, 'amplitude_factor': 0.9}  # Slightly higher HR, lower amplitude
-        }
-        
-        # Activity level effects
-        self.activity_effects = {
-            'resting': {
-                'heart_rate_factor': 1.0,
-                'respiratory_factor': 1.0,
-                'amplitude_factor': 1.0,
-                'noise_factor': 0.2
-            },
-            'walking': {
-                'heart_rate_factor': 1.3,
-                'respiratory_factor': 1.5,
-                'amplitude_factor': 1.2,
-                'noise_factor': 0.5
-            },
-            'running': {
-                'heart_rate_factor': 1.9,
-                'respiratory_factor': 2.0,
-                'amplitude_factor': 1.5,
-                'noise_factor': 0.8
-            },
-            'sleeping': {
-                'heart_rate_factor': 0.8,
-                'respiratory_factor': 0.6,
-                'amplitude_factor': 0.7,
-                'noise_factor': 0.1
-            },
-            'sex_time': {
-                'heart_rate_factor': 1.8,
-                'respiratory_factor': 1.8,
-                'amplitude_factor': 1.4,
-                'noise_factor': 0.6
-            }
-        }
+    @contextmanager
+    def batch_update(self) -> Iterator[None]:
+        """
+        Defer physiology recalculation until the outermost block exits
         
-        # Fitness level adjustments
-        self.fitness_effects = {
-            'athletic': {'hr_factor': 0.8, 'hrv': 'high'},
-            'average': {'hr_factor': 1.0, 'hrv': 'normal'},
-            'sedentary': {'hr_factor': 1.1, 'hrv': 'low'}
-        }
+        Example:
+            with model.batch_update():
+                model.update_parameters({'age': 45})
+                model.update_parameters({'activity': 'running'})
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._recalc_pending:
+                self._recalc_pending = False
+                self._recalculate_physiology()
+    
+    def _request_recalculation(self):
+        """Recalculate now, or mark pending when inside batch_update()"""
+        if self._batch_depth:
+            self._recalc_pending = True
+        else:
+            self._recalculate_physiology()
     
     def update_parameters(self, parameters: Dict[str, Any]) -> bool:
         """
@@ -122,21 +245,27 @@ class PhysiologicalModel:
             bool: Success status
         """
         try:
-            # Update basic parameters
-            for key, value in parameters.items():
-                if hasattr(self.state, key):
-                    setattr(self.state, key, value)
-            
-            # Recalculate dependent physiological parameters
-            self._recalculate_physiology()
+            self._apply_parameters(parameters.items())
             
-            self.logger.info(f"Updated parameters: {list(parameters.keys())}")
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("Updated parameters: %s", list(parameters))
             return True
             
         except Exception as e:
             self.logger.error(f"Error updating parameters: {e}")
             return False
     
+    def _apply_parameters(self, items: Iterable[Tuple[str, Any]]):
+        """Set known state fields from (name, value) pairs and recalculate"""
+        # Update basic parameters
+        state = self.state
+        for key, value in items:
+            if key in _STATE_FIELDS:
+                setattr(state, key, value)
+        
+        # Recalculate dependent physiological parameters
+        self._request_recalculation()
+    
     def set_scenario(self, scenario_name: str) -> bool:
         """
         Apply a pre-defined scenario to the physiological model
@@ -147,127 +276,132 @@ class PhysiologicalModel:
         Returns:
             bool: Success status
         """
-        scenario = self.scenario_manager.get_scenario(scenario_name)
-        if not scenario:
+        resolved = self._resolve_scenario(scenario_name, self.scenario_manager.version)
+        if resolved is None:
             self.logger.error(f"Scenario not found: {scenario_name}")
             return False
         
+        physio_items, has_description, activity = resolved
         try:
-            # Update physiological parameters from scenario
-            physio_params = scenario.get('physiological', {})
-            self.update_parameters(physio_params)
-            
-            # Update activity and condition if specified
-            if 'description' in scenario:
-                self.state.condition = scenario_name
-                if any(activity in scenario_name for activity in ['walking', 'running', 'sleeping', 'sex']):
-                    self.state.activity = scenario_name.split('_')[0]
+            # Recalculate once, after all scenario changes are applied
+            with self.batch_update():
+                # Update physiological parameters from scenario
+                self._apply_parameters(physio_items)
+                
+                # Update activity and condition if specified
+                if has_description:
+                    self.state.condition = scenario_name
+                    if activity:
+                        self.state.activity = activity
+                    self._request_recalculation()
             
-            self.logger.info(f"Applied scenario: {scenario_name}")
+            self.logger.info("Applied scenario: %s", scenario_name)
             return True
             
         except Exception as e:
             self.logger.error(f"Error applying scenario {scenario_name}: {e}")
             return False
     
+    def _resolve_scenario_uncached(self, scenario_name: str, version: int) -> Optional[ResolvedScenario]:
+        """
+        Reduce a scenario to what set_scenario needs
+        
+        ``version`` is the scenario manager's version; it is part of the cache
+        key so edits to the scenario library invalidate old entries.
+        """
+        scenario = self.scenario_manager.get_scenario(scenario_name)
+        if not scenario:
+            return None
+        
+        return (tuple(scenario.get('physiological', {}).items()),
+                'description' in scenario,
+                self._scenario_activity(scenario_name))
+    
+    def _scenario_activity(self, scenario_name: str) -> Optional[str]:
+        """Look up the activity implied by a scenario name"""
+        try:
+            return self._scenario_activity_map[scenario_name]
+        except KeyError:
+            activity = self._scenario_activity_map[scenario_name] = _activity_for_scenario(scenario_name)
+            return activity
+    
     def _recalculate_physiology(self):
         """Recalculate dependent physiological parameters based on current state"""
+        state = self.state
+        
         # Base calculations
-        base_hr = self.age_factors['baseline_hr'](self.state.age)
-        base_rr = self.age_factors['respiratory_rate'](self.state.age)
+        base_hr = _baseline_heart_rate(state.age)
+        base_rr = _baseline_respiratory_rate(state.age)
         
         # Apply gender adjustments
-        gender_adj = self.gender_factors.get(self.state.gender, self.gender_factors['male'])
+        gender_adj = _GENDER_FACTORS.get(state.gender, _GENDER_FACTORS['male'])
         base_hr += gender_adj['hr_offset']
         
         # Apply activity effects
-        activity_eff = self.activity_effects.get(self.state.activity, self.activity_effects['resting'])
-        self.state.heart_rate_bpm = base_hr * activity_eff['heart_rate_factor']
-        self.state.respiratory_rate = int(base_rr * activity_eff['respiratory_factor'])
+        activity_eff = _ACTIVITY_EFFECTS.get(state.activity, _ACTIVITY_EFFECTS['resting'])
+        state.heart_rate_bpm = base_hr * activity_eff['heart_rate_factor']
+        state.respiratory_rate = int(base_rr * activity_eff['respiratory_factor'])
         
         # Apply fitness level
-        fitness_eff = self.fitness_effects.get(self.state.fitness_level, self.fitness_effects['average'])
-        self.state.heart_rate_bpm *= fitness_eff['hr_factor']
-        self.state.heart_rate_variability = fitness_eff['hrv']
+        fitness_eff = _FITNESS_EFFECTS.get(state.fitness_level, _FITNESS_EFFECTS['average'])
+        state.heart_rate_bpm *= fitness_eff['hr_factor']
+        state.heart_rate_variability = fitness_eff['hrv']
         
         # Apply amplitude adjustments
-        self.state.pulse_amplitude_red = int(10000 * activity_eff['amplitude_factor'] * gender_adj['amplitude_factor'])
-        self.state.pulse_amplitude_ir = int(self.state.pulse_amplitude_red * 0.95)
+        state.pulse_amplitude_red = int(10000 * activity_eff['amplitude_factor'] * gender_adj['amplitude_factor'])
+        state.pulse_amplitude_ir = int(state.pulse_amplitude_red * 0.95)
         
         # Apply noise adjustments
-        self.state.noise_level = 0.05 * activity_eff['noise_factor']
+        state.noise_level = 0.05 * activity_eff['noise_factor']
         
         # Condition-specific overrides
         self._apply_condition_effects()
         
         # Ensure realistic ranges
         self._clamp_to_physiological_ranges()
+        
+        self._sync_state_dict()
+    
+    def _sync_state_dict(self):
+        """Refresh the cached state dictionary in place after a state change"""
+        self._state_dict.update(zip(_STATE_FIELD_NAMES, _get_state_values(self.state)))
+        self.version += 1
     
     def _apply_condition_effects(self):
         """Apply specific effects based on medical condition"""
-        condition_effects = {
-            'heart_attack': {
-                'heart_rate_bpm': 45,
-                'spo2_percent': 85,
-                'respiratory_rate': 8,
-                'pulse_amplitude_red': 5000,
-                'pulse_amplitude_ir': 4500,
-                'noise_level': 0.1,
-                'pulse_rhythm': 'irregular',
-                'pulse_quality': 'weak'
-            },
-            'extreme_anxiety': {
-                'heart_rate_bpm': 120,
-                'spo2_percent': 95,
-                'respiratory_rate': 25,
-                'pulse_amplitude_red': 12000,
-                'pulse_amplitude_ir': 11500,
-                'noise_level': 0.15,
-                'heart_rate_variability': 'low'
-            },
-            'shock': {
-                'heart_rate_bpm': 140,
-                'spo2_percent': 82,
-                'respiratory_rate': 35,
-                'pulse_amplitude_red': 3000,
-                'pulse_amplitude_ir': 2800,
-                'noise_level': 0.25,
-                'pulse_quality': 'weak'
-            },
-            'fear': {
-                'heart_rate_bpm': 110,
-                'spo2_percent': 96,
-                'respiratory_rate': 22,
-                'pulse_amplitude_red': 11000,
-                'pulse_amplitude_ir': 10500,
-                'noise_level': 0.12,
-                'heart_rate_variability': 'very_low'
-            }
-        }
-        
-        if self.state.condition in condition_effects:
-            effects = condition_effects[self.state.condition]
-            for param, value in effects.items():
-                if hasattr(self.state, param):
-                    setattr(self.state, param, value)
+        effects = _CONDITION_EFFECTS.get(self.state.condition)
+        if effects:
+            state = self.state
+            for param, value in effects:
+                if param in _STATE_FIELDS:
+                    setattr(state, param, value)
     
     def _clamp_to_physiological_ranges(self):
         """Ensure all parameters stay within physiologically possible ranges"""
+        # Conditional expressions avoid the min()/max() call overhead
+        state = self.state
+        
         # Heart rate limits
-        self.state.heart_rate_bpm = max(30, min(220, self.state.heart_rate_bpm))
+        value = state.heart_rate_bpm
+        state.heart_rate_bpm = 30 if value < 30 else 220 if value > 220 else value
         
         # SpO2 limits
-        self.state.spo2_percent = max(70, min(100, self.state.spo2_percent))
+        value = state.spo2_percent
+        state.spo2_percent = 70 if value < 70 else 100 if value > 100 else value
         
         # Respiratory rate limits
-        self.state.respiratory_rate = max(6, min(60, self.state.respiratory_rate))
+        value = state.respiratory_rate
+        state.respiratory_rate = 6 if value < 6 else 60 if value > 60 else value
         
         # Amplitude limits
-        self.state.pulse_amplitude_red = max(1000, min(20000, self.state.pulse_amplitude_red))
-        self.state.pulse_amplitude_ir = max(1000, min(20000, self.state.pulse_amplitude_ir))
+        value = state.pulse_amplitude_red
+        state.pulse_amplitude_red = 1000 if value < 1000 else 20000 if value > 20000 else value
+        value = state.pulse_amplitude_ir
+        state.pulse_amplitude_ir = 1000 if value < 1000 else 20000 if value > 20000 else value
         
         # Noise level limits
-        self.state.noise_level = max(0.01, min(1.0, self.state.noise_level))
+        value = state.noise_level
+        state.noise_level = 0.01 if value < 0.01 else 1.0 if value > 1.0 else value
     
     def get_current_state(self) -> Dict[str, Any]:
         """
@@ -276,7 +410,7 @@ class PhysiologicalModel:
         Returns:
             Dictionary containing all current physiological parameters
         """
-        return asdict(self.state)
+        return self._state_dict.copy()
     
     def reset_to_defaults(self):
         """Reset the physiological model to default values"""
@@ -300,8 +434,9 @@ class PhysiologicalModel:
         self.state.heart_rate_bpm = normal_hr + (stress_hr - normal_hr) * stress_level
         self.state.respiratory_rate = int(16 + (25 - 16) * stress_level)
         self.state.noise_level = 0.05 + (0.15 - 0.05) * stress_level
+        self._sync_state_dict()
         
-        self.logger.info(f"Applied stress response: level {stress_level:.2f}")
+        self.logger.info("Applied stress response: level %.2f", stress_level)
     
     def get_physiological_summary(self) -> Dict[str, Any]:
         """
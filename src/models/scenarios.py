@@ -1,7 +1,51 @@
 import json
 import logging
+import mmap
 import os
-from typing import Dict, Any, Optional, List
+from types import MappingProxyType
+from typing import Dict, Any, FrozenSet, Mapping, Optional, List, Tuple
+
+try:
+    # Optional accelerator for scenario file I/O
+    import orjson
+except ImportError:
+    orjson = None
+
+# Name keywords identifying each predefined scenario type
+_TYPE_KEYWORDS = {
+    'normal': ('normal', 'resting'),
+    'emergency': ('heart_attack', 'anxiety', 'shock', 'fear'),
+    'activity': ('walking', 'running', 'sleeping', 'sex'),
+}
+
+# Valid physiological parameter ranges for scenario validation
+_VALID_RANGES = {
+    'heart_rate_bpm': (30, 220),
+    'spo2_percent': (70, 100),
+    'respiratory_rate': (6, 60),
+    'pulse_amplitude_red': (1000, 20000),
+    'pulse_amplitude_ir': (1000, 20000),
+    'noise_level': (0.01, 1.0)
+}
+
+def _load_json_file(file_path: str) -> Any:
+    """Parse a JSON file, handing orjson a memory map of it where possible"""
+    with open(file_path, 'rb') as f:
+        if orjson is None:
+            return json.loads(f.read())
+        
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty or unmappable file: fall back to a buffered read
+            return orjson.loads(f.read())
+        
+        with mapped:
+            view = memoryview(mapped)
+            try:
+                return orjson.loads(view)
+            finally:
+                view.release()
 
 class ScenarioManager:
     """
@@ -9,8 +53,20 @@ class ScenarioManager:
     for the MAX30102 simulator.
     """
     
+    __slots__ = ('_scenarios', '_scenarios_file', '_type_index', '_type_index_version',
+                 '_name_set', '_statistics_cache', 'version', 'logger')
+    
     def __init__(self, scenarios_file: Optional[str] = None):
-        self.scenarios = {}
+        # Type -> scenario names, valid for the library version it was built at
+        self._type_index: Dict[str, List[str]] = {}
+        self._type_index_version = -1
+        # Cached get_scenario_names() result as (version, names)
+        self._name_set: Optional[Tuple[int, FrozenSet[str]]] = None
+        # Cached get_scenario_statistics() result as (version, statistics)
+        self._statistics_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+        # Bumped on every change to the scenario library so callers can
+        # invalidate anything derived from it
+        self.version = 0
         self.setup_logging()
         
         if scenarios_file is None:
@@ -18,7 +74,22 @@ class ScenarioManager:
             current_dir = os.path.dirname(__file__)
             scenarios_file = os.path.join(current_dir, '..', '..', 'config', 'scenarios.json')
         
-        self.load_scenarios(scenarios_file)
+        # Parsed on first access of self.scenarios
+        self._scenarios_file = scenarios_file
+        self._scenarios: Optional[Dict[str, Dict[str, Any]]] = None
+    
+    @property
+    def scenarios(self) -> Dict[str, Dict[str, Any]]:
+        """Scenario library, loaded from the scenarios file on first access"""
+        if self._scenarios is None:
+            scenarios = self._read_scenarios_file(self._scenarios_file)
+            self._scenarios = scenarios if scenarios is not None else {}
+        return self._scenarios
+    
+    @scenarios.setter
+    def scenarios(self, scenarios: Dict[str, Dict[str, Any]]):
+        self._scenarios = scenarios
+        self.version += 1
     
     def setup_logging(self):
         """Setup logging for scenario manager"""
@@ -34,23 +105,31 @@ class ScenarioManager:
         Returns:
             bool: Success status
         """
+        scenarios = self._read_scenarios_file(file_path)
+        if scenarios is None:
+            return False
+        
+        self.scenarios = scenarios
+        return True
+    
+    def _read_scenarios_file(self, file_path: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Parse a scenarios JSON file, returning None (and logging) on failure"""
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+            data = _load_json_file(file_path)
             
-            self.scenarios = data.get('scenarios', {})
-            self.logger.info(f"Loaded {len(self.scenarios)} scenarios from {file_path}")
-            return True
+            scenarios = data.get('scenarios', {})
+            self.logger.info(f"Loaded {len(scenarios)} scenarios from {file_path}")
+            return scenarios
             
         except FileNotFoundError:
             self.logger.error(f"Scenarios file not found: {file_path}")
-            return False
+            return None
         except json.JSONDecodeError as e:
             self.logger.error(f"Invalid JSON in scenarios file: {e}")
-            return False
+            return None
         except Exception as e:
             self.logger.error(f"Error loading scenarios: {e}")
-            return False
+            return None
     
     def get_scenario(self, scenario_name: str) -> Optional[Dict[str, Any]]:
         """
@@ -67,23 +146,32 @@ class ScenarioManager:
             self.logger.warning(f"Scenario not found: {scenario_name}")
         return scenario
     
-    def get_all_scenarios(self) -> Dict[str, Dict[str, Any]]:
+    def get_all_scenarios(self, copy: bool = False) -> Mapping[str, Dict[str, Any]]:
         """
         Get all available scenarios
         
+        Args:
+            copy: Return a mutable shallow copy instead of a read-only view
+            
         Returns:
-            Dictionary of all scenarios
+            Read-only view of all scenarios (reflects later changes),
+            or a dictionary copy if copy is True
         """
-        return self.scenarios.copy()
+        if copy:
+            return self.scenarios.copy()
+        return MappingProxyType(self.scenarios)
     
-    def get_scenario_names(self) -> List[str]:
+    def get_scenario_names(self) -> FrozenSet[str]:
         """
-        Get list of all available scenario names
+        Get the names of all available scenarios
         
         Returns:
-            List of scenario names
+            Frozen set of scenario names, rebuilt only after library changes
         """
-        return list(self.scenarios.keys())
+        cached = self._name_set
+        if cached is None or cached[0] != self.version:
+            cached = self._name_set = (self.version, frozenset(self.scenarios))
+        return cached[1]
     
     def get_scenarios_by_type(self, scenario_type: str) -> Dict[str, Dict[str, Any]]:
         """
@@ -95,21 +183,48 @@ class ScenarioManager:
         Returns:
             Dictionary of filtered scenarios
         """
-        filtered = {}
-        type_keywords = {
-            'normal': ['normal', 'resting'],
-            'emergency': ['heart_attack', 'anxiety', 'shock', 'fear'],
-            'activity': ['walking', 'running', 'sleeping', 'sex'],
-            'all': list(self.scenarios.keys())
-        }
-        
-        keywords = type_keywords.get(scenario_type, [scenario_type])
+        names = self._scenario_type_index().get(scenario_type)
+        if names is None:
+            # Not a predefined type: treat the type itself as a name keyword
+            names = [name for name in self.scenarios if scenario_type in name]
         
-        for name, scenario in self.scenarios.items():
+        scenarios = self.scenarios
+        return {name: scenarios[name] for name in names}
+    
+    def _scenario_type_index(self) -> Dict[str, List[str]]:
+        """Return the type -> scenario names index, rebuilding it if the library was reloaded"""
+        if self._type_index_version != self.version:
+            self._type_index = {scenario_type: [] for scenario_type in _TYPE_KEYWORDS}
+            self._type_index['all'] = []
+            for name in self.scenarios:
+                self._index_scenario(name)
+            self._type_index_version = self.version
+        return self._type_index
+    
+    def _index_scenario(self, name: str):
+        """Add a scenario name to every type bucket it matches"""
+        index = self._type_index
+        for scenario_type, keywords in _TYPE_KEYWORDS.items():
             if any(keyword in name for keyword in keywords):
-                filtered[name] = scenario
-        
-        return filtered
+                index[scenario_type].append(name)
+        index['all'].append(name)
+    
+    def _unindex_scenario(self, name: str):
+        """Remove a scenario name from every type bucket holding it"""
+        for names in self._type_index.values():
+            if name in names:
+                names.remove(name)
+    
+    def _bump_version(self, added: Optional[str] = None, removed: Optional[str] = None):
+        """Record a library change, keeping an up-to-date type index current"""
+        index_current = self._type_index_version == self.version
+        self.version += 1
+        if index_current:
+            if added is not None:
+                self._index_scenario(added)
+            if removed is not None:
+                self._unindex_scenario(removed)
+            self._type_index_version = self.version
     
     def create_custom_scenario(self, name: str, description: str, 
                              physiological_params: Dict[str, Any]) -> bool:
@@ -132,6 +247,7 @@ class ScenarioManager:
             'description': description,
             'physiological': physiological_params
         }
+        self._bump_version(added=name)
         
         self.logger.info(f"Created custom scenario: {name}")
         return True
@@ -163,6 +279,8 @@ class ScenarioManager:
             for key, value in updates['physiological'].items():
                 self.scenarios[name]['physiological'][key] = value
         
+        # Names are unchanged, so the type index stays valid
+        self._bump_version()
         self.logger.info(f"Updated scenario: {name}")
         return True
     
@@ -181,6 +299,7 @@ class ScenarioManager:
             return False
         
         del self.scenarios[name]
+        self._bump_version(removed=name)
         self.logger.info(f"Deleted scenario: {name}")
         return True
     
@@ -196,8 +315,12 @@ class ScenarioManager:
         """
         try:
             data = {'scenarios': self.scenarios}
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            if orjson:
+                with open(file_path, 'wb') as f:
+                    f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            else:
+                with open(file_path, 'w') as f:
+                    json.dump(data, f, indent=2)
             
             self.logger.info(f"Exported {len(self.scenarios)} scenarios to {file_path}")
             return True
@@ -217,22 +340,12 @@ class ScenarioManager:
             List of validation errors (empty if valid)
         """
         errors = []
-        
-        # Valid parameter ranges
-        valid_ranges = {
-            'heart_rate_bpm': (30, 220),
-            'spo2_percent': (70, 100),
-            'respiratory_rate': (6, 60),
-            'pulse_amplitude_red': (1000, 20000),
-            'pulse_amplitude_ir': (1000, 20000),
-            'noise_level': (0.01, 1.0)
-        }
+        append = errors.append
         
         for param, value in params.items():
-            if param in valid_ranges:
-                min_val, max_val = valid_ranges[param]
-                if not (min_val <= value <= max_val):
-                    errors.append(f"{param} value {value} outside valid range [{min_val}, {max_val}]")
+            valid_range = _VALID_RANGES.get(param)
+            if valid_range is not None and not (valid_range[0] <= value <= valid_range[1]):
+                append(f"{param} value {value} outside valid range [{valid_range[0]}, {valid_range[1]}]")
         
         return errors
     
@@ -243,29 +356,42 @@ class ScenarioManager:
         Returns:
             Dictionary with scenario statistics
         """
-        total = len(self.scenarios)
-        
-        # Count by type
-        normal_count = len(self.get_scenarios_by_type('normal'))
-        emergency_count = len(self.get_scenarios_by_type('emergency'))
-        activity_count = len(self.get_scenarios_by_type('activity'))
+        cached = self._statistics_cache
+        if cached is not None and cached[0] == self.version:
+            return cached[1].copy()
         
-        # Parameter ranges across all scenarios
-        hr_values = []
-        spo2_values = []
+        index = self._scenario_type_index()
         
+        # Parameter ranges across all scenarios, tracked in a single pass
+        hr_min = hr_max = spo2_min = spo2_max = None
         for scenario in self.scenarios.values():
-            physio = scenario.get('physiological', {})
-            if 'heart_rate_bpm' in physio:
-                hr_values.append(physio['heart_rate_bpm'])
-            if 'spo2_percent' in physio:
-                spo2_values.append(physio['spo2_percent'])
+            physio = scenario.get('physiological')
+            if not physio:
+                continue
+            hr = physio.get('heart_rate_bpm')
+            if hr is not None:
+                if hr_min is None:
+                    hr_min = hr_max = hr
+                elif hr < hr_min:
+                    hr_min = hr
+                elif hr > hr_max:
+                    hr_max = hr
+            spo2 = physio.get('spo2_percent')
+            if spo2 is not None:
+                if spo2_min is None:
+                    spo2_min = spo2_max = spo2
+                elif spo2 < spo2_min:
+                    spo2_min = spo2
+                elif spo2 > spo2_max:
+                    spo2_max = spo2
         
-        return {
-            'total_scenarios': total,
-            'normal_scenarios': normal_count,
-            'emergency_scenarios': emergency_count,
-            'activity_scenarios': activity_count,
-            'heart_rate_range': (min(hr_values), max(hr_values)) if hr_values else (0, 0),
-            'spo2_range': (min(spo2_values), max(spo2_values)) if spo2_values else (0, 0)
-        }
\ No newline at end of file
+        statistics = {
+            'total_scenarios': len(self.scenarios),
+            'normal_scenarios': len(index['normal']),
+            'emergency_scenarios': len(index['emergency']),
+            'activity_scenarios': len(index['activity']),
+            'heart_rate_range': (hr_min, hr_max) if hr_min is not None else (0, 0),
+            'spo2_range': (spo2_min, spo2_max) if spo2_min is not None else (0, 0)
+        }
+        self._statistics_cache = (self.version, statistics)
+        return statistics.copy()
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+FIFO sample packing kernels.
+
+Converts blocks of 18-bit red/IR samples into the MAX30102 FIFO byte
+layout (3 bytes per channel, MSB first). Uses a Numba-compiled loop when
+Numba is installed and a vectorized NumPy implementation otherwise.
+"""
+
+import numpy as np
+
+try:
+    # Optional accelerator for bulk FIFO fills
+    from numba import njit
+except ImportError:
+    njit = None
+
+HAVE_NUMBA = njit is not None
+
+
+def _pack_samples_numpy(red: np.ndarray, ir: np.ndarray, out: np.ndarray) -> None:
+    """Write red/IR samples into out (shape (n, 6), uint8) using NumPy"""
+    out[:, 0] = (red >> 16) & 0x03
+    out[:, 1] = (red >> 8) & 0xFF
+    out[:, 2] = red & 0xFF
+    out[:, 3] = (ir >> 16) & 0x03
+    out[:, 4] = (ir >> 8) & 0xFF
+    out[:, 5] = ir & 0xFF
+
+
+if HAVE_NUMBA:
+    @njit(cache=True)
+    def pack_samples(red, ir, out):
+        """Write red/IR samples into out (shape (n, 6), uint8)"""
+        for i in range(red.shape[0]):
+            red_sample = red[i]
+            ir_sample = ir[i]
+            out[i, 0] = (red_sample >> 16) & 0x03
+            out[i, 1] = (red_sample >> 8) & 0xFF
+            out[i, 2] = red_sample & 0xFF
+            out[i, 3] = (ir_sample >> 16) & 0x03
+            out[i, 4] = (ir_sample >> 8) & 0xFF
+            out[i, 5] = ir_sample & 0xFF
+else:
+    pack_samples = _pack_samples_numpy
@@ -1,8 +1,32 @@
 import logging
 import struct
 import time
-from typing import List, Optional, Tuple, Dict, Any
-from ...config.register_map import *
+import numpy as np
+from typing import Callable, List, Optional, Tuple, Dict, Any
+from config.register_map import *
+from ._fifo_kernels import pack_samples
+
+# One FIFO sample: red and IR channels as an 18-bit value split into its
+# top 2 bits and low 16 bits, big-endian (6 bytes, device byte order)
+_FIFO_SAMPLE = struct.Struct('>BHBH')
+_FIFO_SAMPLE_BYTES = _FIFO_SAMPLE.size
+
+# Register file image: one byte per address in the 8-bit register space,
+# plus a mask marking the addresses the device actually implements
+_REGISTER_SPACE = 0x100
+_DEFAULT_REGISTERS = bytearray(_REGISTER_SPACE)
+_VALID_REG_MASK = bytearray(_REGISTER_SPACE)
+for _register, _value in DEFAULT_REGISTER_VALUES.items():
+    _DEFAULT_REGISTERS[_register] = _value
+    _VALID_REG_MASK[_register] = 1
+_DEFAULT_REGISTERS = bytes(_DEFAULT_REGISTERS)
+_VALID_REG_MASK = bytes(_VALID_REG_MASK)
+del _register, _value
+
+# FIFO_CONFIG SMP_AVE field (bits 7-5) -> samples averaged
+_AVG_TABLE = (1, 2, 4, 8, 16, 32, 1, 1)
+# SPO2_CONFIG SPO2_SR field (bits 4-2) -> sample rate in Hz, indexed by SPO2_SR_*
+_SR_TABLE = (50, 100, 200, 400, 800, 1000, 1600, 3200)
 
 class I2CProtocolSimulator:
     """
@@ -10,13 +34,32 @@ class I2CProtocolSimulator:
     Handles register reads/writes, FIFO operations, and device communication.
     """
     
-    def __init__(self, device_address: int = 0x57):
+    __slots__ = ('device_address', 'registers', 'fifo_size', '_fifo', '_fifo_rows',
+                 '_fifo_head', '_fifo_tail', '_fifo_count', 'i2c_bus_available',
+                 'communication_delay', 'read_operations', 'write_operations', 'errors',
+                 'logger', '_debug_enabled', 'averaging_samples', 'fifo_rollover',
+                 'sample_rate', 'clock', 'sleep', '_next_ready_at')
+    
+    def __init__(self, device_address: int = 0x57,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
         self.device_address = device_address  # MAX30102 default I2C address
-        self.registers = DEFAULT_REGISTER_VALUES.copy()
-        self.fifo_buffer = []
+        self.registers = bytearray(_DEFAULT_REGISTERS)
         self.fifo_size = 32  # 32 samples in FIFO
+        # FIFO ring buffer: head is the oldest sample slot, tail the next free one
+        self._fifo = bytearray(self.fifo_size * _FIFO_SAMPLE_BYTES)
+        # One row per FIFO slot, sharing memory with the ring for bulk writes
+        self._fifo_rows = np.frombuffer(self._fifo, dtype=np.uint8).reshape(self.fifo_size, _FIFO_SAMPLE_BYTES)
+        self._fifo_head = 0
+        self._fifo_tail = 0
+        self._fifo_count = 0
         self.i2c_bus_available = True
-        self.communication_delay = 0.001  # Simulate I2C communication delay
+        self.communication_delay = 0.0  # Simulated I2C delay per byte (0 = no delay)
+        # Time source and sleep used to simulate bus timing
+        self.clock = clock
+        self.sleep = sleep
+        # Clock time at which the last transfer leaves the bus
+        self._next_ready_at = 0.0
         
         # Statistics
         self.read_operations = 0
@@ -29,13 +72,16 @@ class I2CProtocolSimulator:
     def setup_logging(self):
         """Setup logging for I2C protocol simulator"""
         self.logger = logging.getLogger('I2CProtocol')
+        # Checked once so hot paths skip formatting debug messages; call
+        # setup_logging() again after changing the logger level
+        self._debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
     
     def _initialize_device(self):
         """Initialize the MAX30102 device with default register values"""
         self.logger.info(f"Initializing I2C device at address 0x{self.device_address:02X}")
         
         # Clear FIFO
-        self.fifo_buffer.clear()
+        self._clear_fifo()
         
         # Set default operating mode
         self.registers[REG_MODE_CONFIG] = MODE_SPO2
@@ -59,32 +105,25 @@ class I2CProtocolSimulator:
             self.errors += 1
             return False
         
-        if register not in self.registers:
+        if not (0 <= register < _REGISTER_SPACE and _VALID_REG_MASK[register]):
             self.logger.warning(f"Attempt to write to invalid register: 0x{register:02X}")
             self.errors += 1
             return False
         
         try:
-            # Simulate I2C communication delay
-            time.sleep(self.communication_delay)
+            self._start_transfer(1)
             
             # Handle special register behaviors
-            if register == REG_MODE_CONFIG:
-                self._handle_mode_config_write(value)
-            elif register == REG_FIFO_CONFIG:
-                self._handle_fifo_config_write(value)
-            elif register == REG_FIFO_WR_PTR:
-                self._handle_fifo_write_pointer(value)
-            elif register == REG_FIFO_RD_PTR:
-                self._handle_fifo_read_pointer(value)
-            elif register == REG_SPO2_CONFIG:
-                self._handle_spo2_config_write(value)
+            handler = self._WRITE_HANDLERS.get(register)
+            if handler is not None:
+                handler(self, value)
             else:
                 # Normal register write
                 self.registers[register] = value & 0xFF
             
             self.write_operations += 1
-            self.logger.debug(f"I2C Write: REG[0x{register:02X}] = 0x{value:02X}")
+            if self._debug_enabled:
+                self.logger.debug(f"I2C Write: REG[0x{register:02X}] = 0x{value:02X}")
             return True
             
         except Exception as e:
@@ -107,25 +146,24 @@ class I2CProtocolSimulator:
             self.errors += 1
             return None
         
-        if register not in self.registers:
+        if not (0 <= register < _REGISTER_SPACE and _VALID_REG_MASK[register]):
             self.logger.warning(f"Attempt to read from invalid register: 0x{register:02X}")
             self.errors += 1
             return None
         
         try:
-            # Simulate I2C communication delay
-            time.sleep(self.communication_delay)
-            
-            value = self.registers[register]
+            self._start_transfer(1)
             
             # Handle special register behaviors
-            if register == REG_FIFO_DATA:
-                value = self._handle_fifo_data_read()
-            elif register == REG_INTR_STATUS_1:
-                value = self._handle_interrupt_status_read()
+            handler = self._READ_HANDLERS.get(register)
+            if handler is not None:
+                value = handler(self)
+            else:
+                value = self.registers[register]
             
             self.read_operations += 1
-            self.logger.debug(f"I2C Read: REG[0x{register:02X}] = 0x{value:02X}")
+            if self._debug_enabled:
+                self.logger.debug(f"I2C Read: REG[0x{register:02X}] = 0x{value:02X}")
             return value
             
         except Exception as e:
@@ -150,26 +188,21 @@ class I2CProtocolSimulator:
             return None
         
         try:
-            # Simulate I2C communication delay
-            time.sleep(self.communication_delay * count)
+            self._start_transfer(count)
             
-            values = []
-            for i in range(count):
-                register = start_register + i
-                if register in self.registers:
-                    value = self.registers[register]
-                    
-                    # Handle special register behaviors for each register
-                    if register == REG_FIFO_DATA:
-                        value = self._handle_fifo_data_read()
-                    
-                    values.append(value)
-                else:
-                    self.logger.warning(f"Invalid register in burst read: 0x{register:02X}")
-                    values.append(0x00)
+            end_register = start_register + count
+            if (0 <= start_register and end_register <= _REGISTER_SPACE
+                    and _VALID_REG_MASK.find(0, start_register, end_register) == -1
+                    and not start_register <= REG_FIFO_DATA < end_register):
+                # Every register in range is implemented and none has read
+                # side effects: copy the block straight out of the register file
+                values = list(self.registers[start_register:end_register])
+            else:
+                values = self._read_registers_checked(start_register, count)
             
             self.read_operations += 1  # Count as one operation
-            self.logger.debug(f"I2C Burst Read: REG[0x{start_register:02X}], {count} bytes")
+            if self._debug_enabled:
+                self.logger.debug(f"I2C Burst Read: REG[0x{start_register:02X}], {count} bytes")
             return values
             
         except Exception as e:
@@ -177,6 +210,24 @@ class I2CProtocolSimulator:
             self.errors += 1
             return None
     
+    def _read_registers_checked(self, start_register: int, count: int) -> List[int]:
+        """Read a register range one address at a time, for ranges with gaps or FIFO_DATA"""
+        values = []
+        for i in range(count):
+            register = start_register + i
+            if 0 <= register < _REGISTER_SPACE and _VALID_REG_MASK[register]:
+                value = self.registers[register]
+                
+                # Handle special register behaviors for each register
+                if register == REG_FIFO_DATA:
+                    value = self._handle_fifo_data_read()
+                
+                values.append(value)
+            else:
+                self.logger.warning(f"Invalid register in burst read: 0x{register:02X}")
+                values.append(0x00)
+        return values
+    
     def write_registers_burst(self, start_register: int, values: List[int]) -> bool:
         """
         Simulate burst write to multiple registers over I2C
@@ -194,12 +245,11 @@ class I2CProtocolSimulator:
             return False
         
         try:
-            # Simulate I2C communication delay
-            time.sleep(self.communication_delay * len(values))
+            self._start_transfer(len(values))
             
             for i, value in enumerate(values):
                 register = start_register + i
-                if register in self.registers:
+                if 0 <= register < _REGISTER_SPACE and _VALID_REG_MASK[register]:
                     self.registers[register] = value & 0xFF
                     
                     # Handle special register behaviors
@@ -211,7 +261,8 @@ class I2CProtocolSimulator:
                     self.logger.warning(f"Invalid register in burst write: 0x{register:02X}")
             
             self.write_operations += 1  # Count as one operation
-            self.logger.debug(f"I2C Burst Write: REG[0x{start_register:02X}], {len(values)} bytes")
+            if self._debug_enabled:
+                self.logger.debug(f"I2C Burst Write: REG[0x{start_register:02X}], {len(values)} bytes")
             return True
             
         except Exception as e:
@@ -219,6 +270,24 @@ class I2CProtocolSimulator:
             self.errors += 1
             return False
     
+    def _start_transfer(self, byte_count: int):
+        """
+        Wait for the simulated bus to free up, then occupy it for byte_count bytes
+        
+        A transfer does not wait out its own bus time; only one that starts
+        while an earlier transfer is still on the bus sleeps until it ends.
+        """
+        delay = self.communication_delay
+        if not delay:
+            return
+        
+        now = self.clock()
+        ready_at = self._next_ready_at
+        if now < ready_at:
+            self.sleep(ready_at - now)
+            now = ready_at
+        self._next_ready_at = now + delay * byte_count
+    
     def push_sample_to_fifo(self, red_sample: int, ir_sample: int):
         """
         Push a new PPG sample to the FIFO buffer
@@ -227,36 +296,73 @@ class I2CProtocolSimulator:
             red_sample: Red LED PPG sample (18-bit)
             ir_sample: IR LED PPG sample (18-bit)
         """
-        # Convert 18-bit samples to 3-byte format
-        red_bytes = [
-            (red_sample >> 16) & 0x03,  # MSB (bits 17-16)
-            (red_sample >> 8) & 0xFF,   # Middle byte (bits 15-8)
-            red_sample & 0xFF           # LSB (bits 7-0)
-        ]
+        # Check FIFO overflow
+        if self._fifo_count == self.fifo_size:
+            self.registers[REG_OVF_COUNTER] = (self.registers[REG_OVF_COUNTER] + 1) & 0x1F
+            # Overwrite the oldest sample
+            self._fifo_head = (self._fifo_head + 1) % self.fifo_size
+        else:
+            self._fifo_count += 1
         
-        ir_bytes = [
-            (ir_sample >> 16) & 0x03,   # MSB (bits 17-16)
-            (ir_sample >> 8) & 0xFF,    # Middle byte (bits 15-8)
-            ir_sample & 0xFF            # LSB (bits 7-0)
-        ]
+        # Add new sample to FIFO as 3 bytes per channel
+        _FIFO_SAMPLE.pack_into(self._fifo, self._fifo_tail * _FIFO_SAMPLE_BYTES,
+                               (red_sample >> 16) & 0x03, red_sample & 0xFFFF,
+                               (ir_sample >> 16) & 0x03, ir_sample & 0xFFFF)
+        self._fifo_tail = (self._fifo_tail + 1) % self.fifo_size
         
-        sample_data = red_bytes + ir_bytes  # 6 bytes total per sample
+        # Update FIFO pointers and almost-full status
+        self._update_fifo_pointers()
+    
+    def push_samples_bulk(self, red_samples: np.ndarray, ir_samples: np.ndarray) -> int:
+        """
+        Push a block of PPG samples to the FIFO buffer in one operation
         
-        # Check FIFO overflow
-        if len(self.fifo_buffer) >= self.fifo_size:
-            self.registers[REG_OVF_COUNTER] = (self.registers[REG_OVF_COUNTER] + 1) & 0x1F
-            if self.fifo_buffer:
-                self.fifo_buffer.pop(0)  # Remove oldest sample
+        Equivalent to calling push_sample_to_fifo for each sample pair, but
+        the byte conversion runs as a compiled (Numba) or vectorized (NumPy)
+        kernel and only the samples that remain in the FIFO are written.
         
-        # Add new sample to FIFO
-        self.fifo_buffer.append(sample_data)
+        Args:
+            red_samples: Red LED PPG samples (18-bit)
+            ir_samples: IR LED PPG samples (18-bit)
+            
+        Returns:
+            int: Number of samples pushed
+        """
+        red = np.asarray(red_samples, dtype=np.uint32).ravel()
+        ir = np.asarray(ir_samples, dtype=np.uint32).ravel()
+        
+        if red.shape != ir.shape:
+            self.logger.error(f"Bulk FIFO push size mismatch: {red.size} red vs {ir.size} IR samples")
+            return 0
+        
+        pushed = red.size
+        if pushed == 0:
+            return 0
+        
+        # Only the newest fifo_size samples survive an overflowing push
+        kept = min(pushed, self.fifo_size)
+        red = red[-kept:]
+        ir = ir[-kept:]
+        
+        # Pack straight into the ring, wrapping around the end at most once
+        start = (self._fifo_tail + pushed - kept) % self.fifo_size
+        first = min(kept, self.fifo_size - start)
+        pack_samples(red[:first], ir[:first], self._fifo_rows[start:start + first])
+        pack_samples(red[first:], ir[first:], self._fifo_rows[:kept - first])
+        
+        overflowed = self._fifo_count + pushed - self.fifo_size
+        self._fifo_tail = (self._fifo_tail + pushed) % self.fifo_size
+        if overflowed > 0:
+            self.registers[REG_OVF_COUNTER] = (self.registers[REG_OVF_COUNTER] + overflowed) & 0x1F
+            self._fifo_head = self._fifo_tail
+            self._fifo_count = self.fifo_size
+        else:
+            self._fifo_count += pushed
         
-        # Update FIFO pointers and status
+        # Update FIFO pointers and almost-full status
         self._update_fifo_pointers()
         
-        # Set FIFO data ready interrupt
-        if len(self.fifo_buffer) > 0:
-            self.registers[REG_INTR_STATUS_1] |= 0x10  # Set FIFO almost full flag
+        return pushed
     
     def read_fifo_samples(self, sample_count: int) -> List[Tuple[int, int]]:
         """
@@ -268,23 +374,42 @@ class I2CProtocolSimulator:
         Returns:
             List of (red_sample, ir_sample) tuples
         """
-        samples = []
+        count = max(0, min(sample_count, self._fifo_count))
+        head = self._fifo_head
         
-        for _ in range(min(sample_count, len(self.fifo_buffer))):
-            if self.fifo_buffer:
-                sample_data = self.fifo_buffer.pop(0)
-                
-                # Convert 6 bytes back to two 18-bit samples
-                red_sample = (sample_data[0] << 16) | (sample_data[1] << 8) | sample_data[2]
-                ir_sample = (sample_data[3] << 16) | (sample_data[4] << 8) | sample_data[5]
-                
-                samples.append((red_sample, ir_sample))
+        # The samples occupy at most two contiguous runs of the ring
+        fifo = memoryview(self._fifo)
+        first = min(count, self.fifo_size - head)
+        runs = (fifo[head * _FIFO_SAMPLE_BYTES:(head + first) * _FIFO_SAMPLE_BYTES],
+                fifo[:(count - first) * _FIFO_SAMPLE_BYTES])
+        
+        # Convert each 6-byte record back to two 18-bit samples
+        samples = [((red_high << 16) | red_low, (ir_high << 16) | ir_low)
+                   for run in runs
+                   for red_high, red_low, ir_high, ir_low in _FIFO_SAMPLE.iter_unpack(run)]
+        
+        self._fifo_head = (head + count) % self.fifo_size
+        self._fifo_count -= count
         
         # Update FIFO pointers after reading
         self._update_fifo_pointers()
         
         return samples
     
+    @property
+    def fifo_buffer(self) -> List[bytes]:
+        """Snapshot of the FIFO contents as 6-byte samples, oldest first"""
+        fifo = self._fifo
+        slots = ((self._fifo_head + i) % self.fifo_size for i in range(self._fifo_count))
+        return [bytes(fifo[slot * _FIFO_SAMPLE_BYTES:(slot + 1) * _FIFO_SAMPLE_BYTES])
+                for slot in slots]
+    
+    def _clear_fifo(self):
+        """Discard all samples in the FIFO"""
+        self._fifo_head = 0
+        self._fifo_tail = 0
+        self._fifo_count = 0
+    
     def _handle_mode_config_write(self, value: int):
         """Handle writes to MODE_CONFIG register"""
         if value & 0x40:  # Reset bit
@@ -304,13 +429,13 @@ class I2CProtocolSimulator:
         
         # Extract FIFO averaging
         average_bits = (value >> 5) & 0x07
-        averaging_map = {0: 1, 1: 2, 2: 4, 3: 8, 4: 16, 5: 32}
-        self.averaging_samples = averaging_map.get(average_bits, 1)
+        self.averaging_samples = _AVG_TABLE[average_bits]
         
         # Extract FIFO rollover
         self.fifo_rollover = bool(value & 0x10)
         
-        self.logger.debug(f"FIFO config: averaging={self.averaging_samples}, rollover={self.fifo_rollover}")
+        if self._debug_enabled:
+            self.logger.debug(f"FIFO config: averaging={self.averaging_samples}, rollover={self.fifo_rollover}")
     
     def _handle_spo2_config_write(self, value: int):
         """Handle writes to SPO2_CONFIG register"""
@@ -318,19 +443,9 @@ class I2CProtocolSimulator:
         
         # Extract sample rate
         sr_bits = (value >> 2) & 0x07
-        sample_rates = {
-            SPO2_SR_50: 50,
-            SPO2_SR_100: 100, 
-            SPO2_SR_200: 200,
-            SPO2_SR_400: 400,
-            SPO2_SR_800: 800,
-            SPO2_SR_1000: 1000,
-            SPO2_SR_1600: 1600,
-            SPO2_SR_3200: 3200
-        }
-        
-        self.sample_rate = sample_rates.get(sr_bits, 100)
-        self.logger.debug(f"SpO2 config: sample_rate={self.sample_rate}Hz")
+        self.sample_rate = _SR_TABLE[sr_bits]
+        if self._debug_enabled:
+            self.logger.debug(f"SpO2 config: sample_rate={self.sample_rate}Hz")
     
     def _handle_fifo_write_pointer(self, value: int):
         """Handle writes to FIFO_WR_PTR register"""
@@ -342,7 +457,7 @@ class I2CProtocolSimulator:
     
     def _handle_fifo_data_read(self) -> int:
         """Handle reads from FIFO_DATA register"""
-        if not self.fifo_buffer:
+        if not self._fifo_count:
             return 0x00
         
         rd_ptr = self.registers[REG_FIFO_RD_PTR]
@@ -356,8 +471,9 @@ class I2CProtocolSimulator:
         sample_index = (rd_ptr // 6) % self.fifo_size
         byte_index = rd_ptr % 6
         
-        if sample_index < len(self.fifo_buffer):
-            value = self.fifo_buffer[sample_index][byte_index]
+        if sample_index < self._fifo_count:
+            slot = (self._fifo_head + sample_index) % self.fifo_size
+            value = self._fifo[slot * _FIFO_SAMPLE_BYTES + byte_index]
             
             # Advance read pointer
             self.registers[REG_FIFO_RD_PTR] = (rd_ptr + 1) % (self.fifo_size * 6)
@@ -381,10 +497,10 @@ class I2CProtocolSimulator:
         self.logger.info("Performing device reset")
         
         # Reset all registers to default values
-        self.registers = DEFAULT_REGISTER_VALUES.copy()
+        self.registers[:] = _DEFAULT_REGISTERS
         
         # Clear FIFO
-        self.fifo_buffer.clear()
+        self._clear_fifo()
         
         # Reset statistics
         self.read_operations = 0
@@ -395,7 +511,7 @@ class I2CProtocolSimulator:
     
     def _update_fifo_pointers(self):
         """Update FIFO write pointer based on current buffer state"""
-        samples_in_fifo = len(self.fifo_buffer)
+        samples_in_fifo = self._fifo_count
         self.registers[REG_FIFO_WR_PTR] = (samples_in_fifo * 6) % (self.fifo_size * 6)
         
         # Set/clear FIFO almost full flag
@@ -415,7 +531,7 @@ class I2CProtocolSimulator:
         """
         return {
             'device_address': f"0x{self.device_address:02X}",
-            'fifo_samples': len(self.fifo_buffer),
+            'fifo_samples': self._fifo_count,
             'sample_rate': getattr(self, 'sample_rate', 100),
             'averaging_samples': getattr(self, 'averaging_samples', 1),
             'fifo_rollover': getattr(self, 'fifo_rollover', True),
@@ -445,4 +561,18 @@ class I2CProtocolSimulator:
         """
         self.i2c_bus_available = available
         status = "available" if available else "unavailable"
-        self.logger.debug(f"I2C bus set to {status}")
\ No newline at end of file
+        self.logger.debug(f"I2C bus set to {status}")
+    
+    # Registers with side effects, dispatched by address from
+    # write_register/read_register (all other registers are plain storage)
+    _WRITE_HANDLERS = {
+        REG_MODE_CONFIG: _handle_mode_config_write,
+        REG_FIFO_CONFIG: _handle_fifo_config_write,
+        REG_FIFO_WR_PTR: _handle_fifo_write_pointer,
+        REG_FIFO_RD_PTR: _handle_fifo_read_pointer,
+        REG_SPO2_CONFIG: _handle_spo2_config_write,
+    }
+    _READ_HANDLERS = {
+        REG_FIFO_DATA: _handle_fifo_data_read,
+        REG_INTR_STATUS_1: _handle_interrupt_status_read,
+    }
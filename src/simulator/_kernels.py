@@ -0,0 +1,76 @@
+"""
+PPG waveform kernels for batched data generation.
+
+ppg_block fills preallocated red/IR arrays with the noise-free PPG
+waveform (cardiac pulse, diastolic notch and respiratory modulation).
+With Numba installed it is compiled to a single fused loop; otherwise a
+NumPy implementation with the same signature is used. ppg_sample is the
+scalar counterpart used by DataGenerator.generate_data_point.
+"""
+
+import math
+import numpy as np
+
+try:
+    # Optional accelerator for waveform synthesis
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+HAVE_NUMBA = njit is not None
+
+TWO_PI = 2 * np.pi
+
+
+def _ppg_block_numpy(t0, dt, hr_hz, resp_phase0, resp_step,
+                     base_r, base_ir, amp_r, amp_ir, out_r, out_ir):
+    """Fill out_r/out_ir with the PPG waveform for samples t0 + i * dt"""
+    steps = np.arange(out_r.shape[0])
+    phase = (t0 + steps * dt) * (hr_hz * TWO_PI)
+    cardiac_signal = np.sin(phase) ** 3 + 0.3 * np.sin(2 * phase - np.pi/4) ** 2
+
+    # Respiratory phase advances by one step before each sample
+    respiratory_modulation = 0.1 * np.sin((resp_phase0 + resp_step * (steps + 1)) % TWO_PI)
+    modulated = cardiac_signal * (1 + 0.05 * respiratory_modulation)
+
+    np.multiply(modulated, amp_r, out=out_r)
+    out_r += base_r
+    np.multiply(modulated * (1.0 + 0.02 * np.sin(phase * 0.5)), amp_ir, out=out_ir)
+    out_ir += base_ir
+
+
+def _ppg_sample_python(phase, resp_phase, base_r, base_ir, amp_r, amp_ir):
+    """Return the (red, ir) PPG values at cardiac phase and respiratory phase"""
+    pulse = math.sin(phase)
+    notch = math.sin(2 * phase - math.pi/4)
+    cardiac_signal = pulse * pulse * pulse + 0.3 * notch * notch
+    
+    modulated = cardiac_signal * (1 + 0.05 * (0.1 * math.sin(resp_phase)))
+    return (base_r + amp_r * modulated,
+            base_ir + amp_ir * modulated * (1.0 + 0.02 * math.sin(phase * 0.5)))
+
+
+if HAVE_NUMBA:
+    ppg_sample = njit('UniTuple(f8, 2)(f8, f8, f8, f8, f8, f8)',
+                      cache=True, fastmath=True)(_ppg_sample_python)
+    
+    @njit('void(f8, f8, f8, f8, f8, f8, f8, f8, f8, f8[:], f8[:])',
+          cache=True, fastmath=True, parallel=True)
+    def ppg_block(t0, dt, hr_hz, resp_phase0, resp_step,
+                  base_r, base_ir, amp_r, amp_ir, out_r, out_ir):
+        """Fill out_r/out_ir with the PPG waveform for samples t0 + i * dt"""
+        cardiac_omega = hr_hz * TWO_PI
+        for i in prange(out_r.shape[0]):
+            phase = (t0 + i * dt) * cardiac_omega
+            pulse = np.sin(phase)
+            notch = np.sin(2 * phase - np.pi/4)
+            cardiac_signal = pulse * pulse * pulse + 0.3 * notch * notch
+
+            respiratory_modulation = 0.1 * np.sin((resp_phase0 + resp_step * (i + 1)) % TWO_PI)
+            modulated = cardiac_signal * (1 + 0.05 * respiratory_modulation)
+
+            out_r[i] = base_r + amp_r * modulated
+            out_ir[i] = base_ir + amp_ir * modulated * (1.0 + 0.02 * np.sin(phase * 0.5))
+else:
+    ppg_sample = _ppg_sample_python
+    ppg_block = _ppg_block_numpy
@@ -1,8 +1,18 @@
+import math
 import numpy as np
 import time
 import logging
-from typing import Dict, List, Tuple, Optional
-from ..models.physiological_model import PhysiologicalModel
+from typing import Any, Dict, List, Tuple, Optional
+from models.physiological_model import PhysiologicalModel
+from ._kernels import ppg_block, ppg_sample
+
+TWO_PI = 2 * math.pi
+# Angular frequency of 50 Hz power-line interference
+_POWER_LINE_OMEGA = TWO_PI * 50
+# Standard normal draws buffered per refill for the scalar path
+_NOISE_BUFFER_SIZE = 8192
+# Longest motion artifact in seconds; also the span of the motion lookup table
+_MOTION_MAX_DURATION = 2.0
 
 class DataGenerator:
     """
@@ -10,11 +20,16 @@ class DataGenerator:
     and sensor configuration.
     """
     
-    def __init__(self, physio_model: PhysiologicalModel):
+    def __init__(self, physio_model: PhysiologicalModel, seed: Optional[int] = None):
         self.physio_model = physio_model
         self.sample_rate = 1000  # Hz
         self.time_index = 0.0
-        self.last_update_time = time.time()
+        
+        # Sample clock: time_index = clock origin + sample count / sample rate,
+        # mapped to wall-clock timestamps through a single anchor
+        self._clock_origin = 0.0
+        self._sample_count = 0
+        self._wall_t0 = time.time()
         
         # Signal parameters
         self.baseline_red = 50000
@@ -26,7 +41,18 @@ class DataGenerator:
         self.motion_start_time = 0
         self.motion_duration = 0
         
+        # Random source for all noise and motion draws; seed for reproducible output
+        self._rng = np.random.default_rng(seed)
+        
+        # Buffered standard normal draws for the scalar path
+        self._noise_buf: List[float] = []
+        self._noise_idx = 0
+        
+        # Model version the cached parameters were read at
+        self._model_version = -1
+        
         self.setup_logging()
+        self._build_motion_lut()
         self.initialize_waveform_parameters()
     
     def setup_logging(self):
@@ -35,34 +61,27 @@ class DataGenerator:
     
     def initialize_waveform_parameters(self):
         """Initialize waveform generation parameters"""
-        self.heart_rate = self.physio_model.heart_rate_bpm
-        self.respiratory_rate = self.physio_model.respiratory_rate
-        self.pulse_amplitude_red = self.physio_model.pulse_amplitude_red
-        self.pulse_amplitude_ir = self.physio_model.pulse_amplitude_ir
-        self.noise_level = self.physio_model.noise_level
+        self._update_parameters_from_model()
     
     def generate_data_point(self) -> Dict[str, any]:
         """
         Generate a single data point with red and IR PPG waveforms
         
         Returns:
-            Dict containing timestamp, PPG data, and vital signs
+            Dict containing timestamp, PPG data, and vital signs; use
+            generate_data_points or generate_block for bulk generation
         """
-        current_time = time.time()
-        dt = current_time - self.last_update_time
-        self.last_update_time = current_time
-        
-        # Update time index for waveform generation
-        self.time_index += dt
+        sample_time = self.time_index
+        current_time = self._wall_t0 + sample_time
         
         # Get current physiological parameters
-        self._update_parameters_from_model()
+        self._sync_parameters()
         
         # Generate PPG waveforms
         red_ppg, ir_ppg = self._generate_ppg_waveforms()
         
         # Add motion artifacts if applicable
-        red_ppg, ir_ppg = self._add_motion_artifacts(red_ppg, ir_ppg)
+        red_ppg, ir_ppg = self._add_motion_artifacts(red_ppg, ir_ppg, sample_time)
         
         # Add sensor noise
         red_ppg = self._add_sensor_noise(red_ppg)
@@ -71,92 +90,238 @@ class DataGenerator:
         # Calculate derived vital signs
         heart_rate, spo2 = self._calculate_vital_signs(red_ppg, ir_ppg)
         
-        data_point = {
+        self._advance_clock(1)
+        
+        state = self.physio_model.state
+        return {
             'timestamp': current_time,
             'red_ppg': int(red_ppg),
             'ir_ppg': int(ir_ppg),
             'heart_rate': heart_rate,
             'spO2': spo2,
             'sample_rate': self.sample_rate,
-            'activity': self.physio_model.activity,
-            'condition': self.physio_model.condition
+            'activity': state.activity,
+            'condition': state.condition
         }
+    
+    def generate_block(self, n: int) -> Dict[str, Any]:
+        """
+        Generate n consecutive samples at the configured sample rate
+        
+        Samples are spaced 1/sample_rate apart on the generator's sample
+        clock, and model parameters are read once for the whole block.
+        
+        Args:
+            n: Number of samples to generate
+            
+        Returns:
+            Dict with the same keys as generate_data_point, where the
+            per-sample fields are NumPy arrays of length n
+        """
+        start_time = self._wall_t0 + self.time_index
+        self._sync_parameters()
+        
+        sample_offsets = np.arange(n) / self.sample_rate
+        t = self.time_index + sample_offsets
+        
+        # Generate PPG waveforms
+        red_ppg, ir_ppg = self._generate_ppg_block(self.time_index, n)
+        self._advance_clock(n)
+        
+        # Add motion artifacts if applicable
+        self._add_motion_artifacts_block(t, red_ppg, ir_ppg)
         
-        return data_point
+        # Add sensor noise
+        self._add_sensor_noise_block(t, red_ppg, ir_ppg)
+        
+        # Calculate derived vital signs
+        heart_rate, spo2 = self._calculate_vital_signs_block(t)
+        
+        return {
+            'timestamp': start_time + sample_offsets,
+            'red_ppg': red_ppg.astype(np.int64),
+            'ir_ppg': ir_ppg.astype(np.int64),
+            'heart_rate': heart_rate,
+            'spO2': spo2,
+            'sample_rate': self.sample_rate,
+            'activity': self.physio_model.state.activity,
+            'condition': self.physio_model.state.condition
+        }
     
-    def _generate_ppg_waveforms(self) -> Tuple[float, float]:
+    def generate_data_points(self, n: int) -> np.ndarray:
         """
-        Generate synchronized red and IR PPG waveforms
+        Generate n consecutive samples as a numeric array
         
+        Args:
+            n: Number of samples to generate
+            
         Returns:
-            Tuple of (red_ppg, ir_ppg) values
+            Array of shape (n, 4) with columns red_ppg, ir_ppg, heart_rate, spO2
         """
-        # Calculate fundamental frequencies
-        heart_rate_hz = self.heart_rate / 60.0  # Convert BPM to Hz
-        respiratory_hz = self.respiratory_rate / 60.0
+        block = self.generate_block(n)
+        return np.column_stack((block['red_ppg'], block['ir_ppg'],
+                                block['heart_rate'], block['spO2']))
+    
+    def _generate_ppg_block(self, t0: float, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Generate synchronized red and IR PPG waveforms for n samples from t0
         
-        # Update respiratory phase
-        self.respiratory_phase += 2 * np.pi * respiratory_hz / self.sample_rate
-        self.respiratory_phase %= 2 * np.pi
+        Args:
+            t0: Time of the first sample in seconds
+            n: Number of samples
+            
+        Returns:
+            Tuple of (red_ppg, ir_ppg) arrays
+        """
+        phase_step = self._resp_phase_step
         
-        # Generate cardiac pulse waveform
-        t = self.time_index * heart_rate_hz * 2 * np.pi
+        red_signal = np.empty(n)
+        ir_signal = np.empty(n)
+        ppg_block(float(t0), 1.0 / self.sample_rate, self.heart_rate / 60.0,
+                  self.respiratory_phase, phase_step,
+                  float(self.baseline_red), float(self.baseline_ir),
+                  float(self.pulse_amplitude_red), float(self.pulse_amplitude_ir),
+                  red_signal, ir_signal)
         
-        # Fundamental pulse shape (systolic peak)
-        pulse_waveform = np.sin(t) ** 3
+        # Respiratory phase after the last sample
+        self.respiratory_phase = (self.respiratory_phase + phase_step * n) % TWO_PI
         
-        # Add diastolic notch for more realistic waveform
-        diastolic_notch = 0.3 * np.sin(2 * t - np.pi/4) ** 2
+        return red_signal, ir_signal
+    
+    def _add_motion_artifacts_block(self, t: np.ndarray, red_ppg: np.ndarray, ir_ppg: np.ndarray):
+        """
+        Add motion artifacts to PPG arrays in place
         
-        # Combine components
-        cardiac_signal = pulse_waveform + diastolic_notch
+        Artifacts start with motion_artifact_probability per sample and are
+        timed on the sample clock t.
         
-        # Add respiratory modulation (baseline wander)
-        respiratory_modulation = 0.1 * np.sin(self.respiratory_phase)
+        Args:
+            t: Sample times in seconds
+            red_ppg: Red PPG values, modified in place
+            ir_ppg: IR PPG values, modified in place
+        """
+        n = t.size
+        probability = self.physio_model.state.motion_artifact_probability
+        start_draws = self._rng.random(n)
+        
+        k = 0
+        while k < n:
+            if not self.motion_artifact_active:
+                starts = np.flatnonzero(start_draws[k:] < probability)
+                if starts.size == 0:
+                    break
+                k += int(starts[0])
+                self.motion_artifact_active = True
+                self.motion_start_time = float(t[k])
+                self.motion_duration = self._rng.uniform(0.1, _MOTION_MAX_DURATION)
+            
+            artifact_time = t[k:] - self.motion_start_time
+            remaining = int(np.searchsorted(artifact_time, self.motion_duration))
+            
+            # Artifact samples fall on the sample grid, so index the lookup table
+            lut_index = np.rint(artifact_time[:remaining] * self.sample_rate).astype(np.intp)
+            lut_index %= self._motion_lut.size
+            motion_artifact = self._motion_lut[lut_index] * (self.pulse_amplitude_red * 0.5)
+            
+            red_ppg[k:k + remaining] += motion_artifact
+            ir_ppg[k:k + remaining] += motion_artifact * 1.1
+            
+            k += remaining
+            if k < n:
+                # Artifact ended at sample k; a new one may start after it
+                self.motion_artifact_active = False
+                k += 1
+    
+    def _add_sensor_noise_block(self, t: np.ndarray, red_ppg: np.ndarray, ir_ppg: np.ndarray):
+        """
+        Add sensor noise to PPG arrays in place
+        
+        Args:
+            t: Sample times in seconds
+            red_ppg: Red PPG values, modified in place
+            ir_ppg: IR PPG values, modified in place
+        """
+        # White + flicker noise combined into one Gaussian per sample and channel
+        noise_scale = self.noise_level * self.pulse_amplitude_red * np.sqrt(1 + 0.3 ** 2)
+        noise = self._rng.standard_normal((2, t.size)) * noise_scale
+        
+        # Power line interference (50 Hz), common to both channels
+        power_line_noise = 0.05 * self.pulse_amplitude_red * np.sin(_POWER_LINE_OMEGA * t)
+        
+        red_ppg += noise[0] + power_line_noise
+        ir_ppg += noise[1] + power_line_noise
+    
+    def _calculate_vital_signs_block(self, t: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate heart rate and SpO2 arrays for sample times t
+        
+        Args:
+            t: Sample times in seconds
+            
+        Returns:
+            Tuple of (heart_rate, spO2) arrays
+        """
+        n = t.size
+        heart_rate = (self.heart_rate +
+                      self._rng.standard_normal(n) +
+                      2.0 * np.sin(self._respiratory_omega * t))
+        
+        # Ratio of ratios (simplified), constant over the block
+        R = ((self.pulse_amplitude_red / self.baseline_red) /
+             (self.pulse_amplitude_ir / self.baseline_ir))
+        spo2 = max(70.0, min(100.0, 110.0 - 25.0 * R))
+        spo2 = spo2 + self._rng.standard_normal(n) * 0.5
+        
+        return np.round(heart_rate, 1), np.round(spo2, 1)
+    
+    def _generate_ppg_waveforms(self) -> Tuple[float, float]:
+        """
+        Generate synchronized red and IR PPG waveforms
         
-        # Generate red and IR signals with different amplitudes and slight phase differences
-        red_signal = (self.baseline_red + 
-                     self.pulse_amplitude_red * cardiac_signal * (1 + 0.05 * respiratory_modulation))
+        Returns:
+            Tuple of (red_ppg, ir_ppg) values
+        """
+        # Update respiratory phase
+        self.respiratory_phase = (self.respiratory_phase + self._resp_phase_step) % TWO_PI
         
-        ir_signal = (self.baseline_ir + 
-                    self.pulse_amplitude_ir * cardiac_signal * (1 + 0.05 * respiratory_modulation) *
-                    (1.0 + 0.02 * np.sin(t * 0.5)))  # Slight different modulation for IR
+        # Cardiac pulse, diastolic notch and respiratory modulation, with a
+        # slightly different modulation for IR
+        red_signal, ir_signal = ppg_sample(
+            self.time_index * self._cardiac_omega, self.respiratory_phase,
+            self.baseline_red, self.baseline_ir,
+            self.pulse_amplitude_red, self.pulse_amplitude_ir)
         
         return red_signal, ir_signal
     
-    def _add_motion_artifacts(self, red_ppg: float, ir_ppg: float) -> Tuple[float, float]:
+    def _add_motion_artifacts(self, red_ppg: float, ir_ppg: float,
+                              current_time: float) -> Tuple[float, float]:
         """
         Add realistic motion artifacts to PPG signals
         
         Args:
             red_ppg: Original red PPG value
             ir_ppg: Original IR PPG value
+            current_time: Sample time in seconds on the generator's sample clock
             
         Returns:
             Tuple of (red_ppg, ir_ppg) with motion artifacts
         """
-        current_time = time.time()
         
         # Check if we should start a new motion artifact
         if (not self.motion_artifact_active and 
-            np.random.random() < self.physio_model.motion_artifact_probability):
+            self._rng.random() < self.physio_model.state.motion_artifact_probability):
             self.motion_artifact_active = True
             self.motion_start_time = current_time
-            self.motion_duration = np.random.uniform(0.1, 2.0)
+            self.motion_duration = self._rng.uniform(0.1, _MOTION_MAX_DURATION)
         
         # Apply motion artifact if active
         if self.motion_artifact_active:
             artifact_time = current_time - self.motion_start_time
             
             if artifact_time < self.motion_duration:
-                # Create motion artifact (combination of low and high frequency components)
-                motion_freq1 = 2.0  # Hz - gross movement
-                motion_freq2 = 8.0  # Hz - tremor/vibration
-                
-                motion_artifact = (
-                    0.7 * np.sin(2 * np.pi * motion_freq1 * artifact_time) +
-                    0.3 * np.sin(2 * np.pi * motion_freq2 * artifact_time)
-                ) * self.pulse_amplitude_red * 0.5
+                # Look up the motion waveform at this sample of the artifact
+                lut_index = round(artifact_time * self.sample_rate) % self._motion_lut.size
+                motion_artifact = self._motion_lut[lut_index] * self.pulse_amplitude_red * 0.5
                 
                 red_ppg += motion_artifact
                 ir_ppg += motion_artifact * 1.1  # Slightly different for IR
@@ -176,14 +341,14 @@ class DataGenerator:
             Signal value with added noise
         """
         # White noise
-        white_noise = np.random.normal(0, self.noise_level * self.pulse_amplitude_red)
+        white_noise = self._randn() * (self.noise_level * self.pulse_amplitude_red)
         
         # 1/f noise (flicker noise) - more realistic for sensors
-        flicker_noise = np.random.normal(0, self.noise_level * self.pulse_amplitude_red * 0.3)
+        flicker_noise = self._randn() * (self.noise_level * self.pulse_amplitude_red * 0.3)
         
         # Power line interference (50/60 Hz)
         power_line_noise = (0.05 * self.pulse_amplitude_red * 
-                          np.sin(2 * np.pi * 50 * self.time_index))
+                          math.sin(_POWER_LINE_OMEGA * self.time_index))
         
         return signal + white_noise + flicker_noise + power_line_noise
     
@@ -202,8 +367,8 @@ class DataGenerator:
         # In a real implementation, this would involve signal processing algorithms
         
         heart_rate = (self.heart_rate + 
-                     np.random.normal(0, 1.0) +  # Small random variation
-                     2.0 * np.sin(2 * np.pi * self.respiratory_rate/60 * self.time_index))  # Respiratory sinus arrhythmia
+                     self._randn() +  # Small random variation
+                     2.0 * math.sin(self._respiratory_omega * self.time_index))  # Respiratory sinus arrhythmia
         
         # SpO2 calculation based on ratio of ratios
         # Simplified model - in reality this requires careful calibration
@@ -220,19 +385,71 @@ class DataGenerator:
         spo2 = max(70.0, min(100.0, spo2))  # Clamp to realistic range
         
         # Add small random variation
-        spo2 += np.random.normal(0, 0.5)
+        spo2 += self._randn() * 0.5
         
         return round(heart_rate, 1), round(spo2, 1)
     
+    def _randn(self) -> float:
+        """Return the next standard normal draw, refilling the buffer in bulk"""
+        idx = self._noise_idx
+        if idx >= len(self._noise_buf):
+            self._noise_buf = self._rng.standard_normal(_NOISE_BUFFER_SIZE).tolist()
+            idx = 0
+        self._noise_idx = idx + 1
+        return self._noise_buf[idx]
+    
+    def _sync_parameters(self):
+        """Re-read model parameters only if the model changed since the last read"""
+        if self._model_version != self.physio_model.version:
+            self._update_parameters_from_model()
+    
     def _update_parameters_from_model(self):
         """Update generator parameters from physiological model"""
-        self.heart_rate = self.physio_model.heart_rate_bpm
-        self.respiratory_rate = self.physio_model.respiratory_rate
-        self.pulse_amplitude_red = self.physio_model.pulse_amplitude_red
-        self.pulse_amplitude_ir = self.physio_model.pulse_amplitude_ir
-        self.noise_level = self.physio_model.noise_level
+        self._model_version = self.physio_model.version
+        state = self.physio_model.state
+        self.heart_rate = state.heart_rate_bpm
+        self.respiratory_rate = state.respiratory_rate
+        self.pulse_amplitude_red = state.pulse_amplitude_red
+        self.pulse_amplitude_ir = state.pulse_amplitude_ir
+        self.noise_level = state.noise_level
+        self._update_waveform_steps()
+    
+    def _build_motion_lut(self):
+        """Tabulate the unit motion-artifact waveform at the current sample rate"""
+        t = np.arange(int(_MOTION_MAX_DURATION * self.sample_rate) + 1) / self.sample_rate
+        
+        # Combination of gross movement (2 Hz) and tremor/vibration (8 Hz)
+        self._motion_lut = (0.7 * np.sin(TWO_PI * 2.0 * t) +
+                            0.3 * np.sin(TWO_PI * 8.0 * t))
+    
+    def _update_waveform_steps(self):
+        """Precompute angular frequencies and per-sample phase steps"""
+        self._cardiac_omega = TWO_PI * self.heart_rate / 60.0
+        self._respiratory_omega = TWO_PI * self.respiratory_rate / 60.0
+        self._resp_phase_step = self._respiratory_omega / self.sample_rate
+    
+    def _advance_clock(self, n: int):
+        """Advance the sample clock by n samples"""
+        self._sample_count += n
+        self.time_index = self._clock_origin + self._sample_count / self.sample_rate
+    
+    def resync_wall_clock(self):
+        """
+        Re-anchor timestamps so the next sample is stamped with the current time
+        
+        The sample clock only advances while samples are generated, so after a
+        pause in generation timestamps would lag the wall clock by the length
+        of the pause. Call this when generation resumes; the sample clock and
+        waveform phase are left untouched.
+        """
+        self._wall_t0 = time.time() - self.time_index
     
     def set_sample_rate(self, sample_rate: int):
         """Set the sample rate for data generation"""
+        # Restart the sample count so earlier samples keep their times
+        self._clock_origin = self.time_index
+        self._sample_count = 0
         self.sample_rate = sample_rate
+        self._update_waveform_steps()
+        self._build_motion_lut()
         self.logger.info(f"Sample rate set to {sample_rate} Hz")
\ No newline at end of file
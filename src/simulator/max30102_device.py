@@ -1,7 +1,28 @@
 import time
 import logging
+import struct
+import numpy as np
 from typing import Dict, List, Optional, Tuple
-from ...config.register_map import *
+from config.register_map import *
+from protocols._fifo_kernels import pack_samples
+
+# One FIFO sample: 3 bytes red then 3 bytes IR, MSB first. Packed one byte
+# per lane on purpose: byte-sized ints are interned by CPython, so the shifts
+# and masks allocate nothing, and this measures faster than packing a
+# combined 48-bit word (e.g. '>HI' or int.to_bytes) per sample.
+_FIFO_SAMPLE = struct.Struct('>6B')
+_FIFO_SAMPLE_BYTES = _FIFO_SAMPLE.size
+
+# Register file image and validity mask, indexed by 8-bit register address
+_REGISTER_SPACE = 0x100
+_DEFAULT_REGISTERS = bytearray(_REGISTER_SPACE)
+_VALID_REG_MASK = bytearray(_REGISTER_SPACE)
+for _register, _value in DEFAULT_REGISTER_VALUES.items():
+    _DEFAULT_REGISTERS[_register] = _value
+    _VALID_REG_MASK[_register] = 1
+_DEFAULT_REGISTERS = bytes(_DEFAULT_REGISTERS)
+_VALID_REG_MASK = bytes(_VALID_REG_MASK)
+del _register, _value
 
 class MAX30102Device:
     """
@@ -10,9 +31,15 @@ class MAX30102Device:
     """
     
     def __init__(self):
-        self.registers = DEFAULT_REGISTER_VALUES.copy()
-        self.fifo_buffer = []
+        self.registers = bytearray(_DEFAULT_REGISTERS)
         self.fifo_size = 32  # 32-sample FIFO
+        # FIFO ring buffer: head is the oldest sample slot, tail the next free one
+        self._fifo = bytearray(self.fifo_size * _FIFO_SAMPLE_BYTES)
+        # One row per FIFO slot, sharing memory with the ring for bulk writes
+        self._fifo_rows = np.frombuffer(self._fifo, dtype=np.uint8).reshape(self.fifo_size, _FIFO_SAMPLE_BYTES)
+        self._fifo_head = 0
+        self._fifo_tail = 0
+        self._fifo_count = 0
         self.sample_count = 0
         self.temperature = 37.0  # Default body temperature
         
@@ -43,7 +70,7 @@ class MAX30102Device:
         Returns:
             bool: Success status
         """
-        if register not in DEFAULT_REGISTER_VALUES:
+        if not (0 <= register < _REGISTER_SPACE and _VALID_REG_MASK[register]):
             self.logger.warning(f"Attempt to write to invalid register: 0x{register:02X}")
             return False
         
@@ -76,7 +103,7 @@ class MAX30102Device:
         if register == REG_FIFO_DATA:
             return self._read_fifo_data()
         
-        if register not in self.registers:
+        if not (0 <= register < _REGISTER_SPACE and _VALID_REG_MASK[register]):
             self.logger.warning(f"Attempt to read from invalid register: 0x{register:02X}")
             return None
         
@@ -94,12 +121,17 @@ class MAX30102Device:
         Returns:
             List[int]: FIFO data bytes
         """
-        data = []
-        for _ in range(min(count, len(self.fifo_buffer))):
-            if self.fifo_buffer:
-                sample = self.fifo_buffer.pop(0)
-                data.extend(sample)
-                self._update_fifo_pointers()
+        count = max(0, min(count, self._fifo_count))
+        head = self._fifo_head
+        
+        # The samples occupy at most two contiguous runs of the ring
+        first = min(count, self.fifo_size - head)
+        data = list(self._fifo[head * _FIFO_SAMPLE_BYTES:(head + first) * _FIFO_SAMPLE_BYTES])
+        data.extend(self._fifo[:(count - first) * _FIFO_SAMPLE_BYTES])
+        
+        self._fifo_head = (head + count) % self.fifo_size
+        self._fifo_count -= count
+        self._update_fifo_pointers()
         
         return data
     
@@ -111,29 +143,82 @@ class MAX30102Device:
             red_sample: Red LED sample value
             ir_sample: IR LED sample value
         """
-        if len(self.fifo_buffer) >= self.fifo_size:
-            # FIFO overflow
+        if self._fifo_count == self.fifo_size:
+            # FIFO overflow: overwrite the oldest sample
             self.registers[REG_OVF_COUNTER] = (self.registers[REG_OVF_COUNTER] + 1) & 0x1F
-            if self.fifo_buffer:
-                self.fifo_buffer.pop(0)
+            self._fifo_head = (self._fifo_head + 1) % self.fifo_size
+        else:
+            self._fifo_count += 1
         
         # Convert samples to 3-byte format (18-bit samples)
-        sample_bytes = [
+        _FIFO_SAMPLE.pack_into(
+            self._fifo, self._fifo_tail * _FIFO_SAMPLE_BYTES,
             (red_sample >> 16) & 0x03,
             (red_sample >> 8) & 0xFF,
             red_sample & 0xFF,
             (ir_sample >> 16) & 0x03,
             (ir_sample >> 8) & 0xFF,
             ir_sample & 0xFF
-        ]
+        )
+        self._fifo_tail = (self._fifo_tail + 1) % self.fifo_size
         
-        self.fifo_buffer.append(sample_bytes)
         self._update_fifo_pointers()
         self.sample_count += 1
     
+    def push_samples_bulk(self, red_samples: np.ndarray, ir_samples: np.ndarray) -> int:
+        """
+        Push a block of samples to the FIFO buffer in one operation
+        
+        Equivalent to calling push_sample_to_fifo for each sample pair, but
+        the byte conversion runs as a compiled (Numba) or vectorized (NumPy)
+        kernel and only the samples that remain in the FIFO are written.
+        
+        Args:
+            red_samples: Red LED sample values (18-bit)
+            ir_samples: IR LED sample values (18-bit)
+            
+        Returns:
+            int: Number of samples pushed
+        """
+        red = np.asarray(red_samples, dtype=np.uint32).ravel()
+        ir = np.asarray(ir_samples, dtype=np.uint32).ravel()
+        
+        if red.shape != ir.shape:
+            self.logger.error(f"Bulk FIFO push size mismatch: {red.size} red vs {ir.size} IR samples")
+            return 0
+        
+        pushed = red.size
+        if pushed == 0:
+            return 0
+        
+        # Only the newest fifo_size samples survive an overflowing push
+        kept = min(pushed, self.fifo_size)
+        red = red[-kept:]
+        ir = ir[-kept:]
+        
+        # Pack straight into the ring, wrapping around the end at most once
+        start = (self._fifo_tail + pushed - kept) % self.fifo_size
+        first = min(kept, self.fifo_size - start)
+        pack_samples(red[:first], ir[:first], self._fifo_rows[start:start + first])
+        pack_samples(red[first:], ir[first:], self._fifo_rows[:kept - first])
+        
+        overflowed = self._fifo_count + pushed - self.fifo_size
+        self._fifo_tail = (self._fifo_tail + pushed) % self.fifo_size
+        if overflowed > 0:
+            self.registers[REG_OVF_COUNTER] = (self.registers[REG_OVF_COUNTER] + overflowed) & 0x1F
+            self._fifo_head = self._fifo_tail
+            self._fifo_count = self.fifo_size
+        else:
+            self._fifo_count += pushed
+        
+        self._update_fifo_pointers()
+        self.sample_count += pushed
+        
+        return pushed
+    
     def _read_fifo_data(self) -> Optional[int]:
         """Read one byte from FIFO data register"""
-        if not self.fifo_buffer:
+        if not self._fifo_count:
             return 0x00
         
         # FIFO data register cycles through the 6 bytes of the current sample
@@ -146,8 +231,9 @@ class MAX30102Device:
         sample_index = (rd_ptr // 6) % self.fifo_size
         byte_index = rd_ptr % 6
         
-        if sample_index < len(self.fifo_buffer):
-            value = self.fifo_buffer[sample_index][byte_index]
+        if sample_index < self._fifo_count:
+            slot = (self._fifo_head + sample_index) % self.fifo_size
+            value = self._fifo[slot * _FIFO_SAMPLE_BYTES + byte_index]
             
             # Advance read pointer
             self.registers[REG_FIFO_RD_PTR] = (rd_ptr + 1) % (self.fifo_size * 6)
@@ -156,9 +242,23 @@ class MAX30102Device:
         
         return 0x00
     
+    @property
+    def fifo_buffer(self) -> List[bytes]:
+        """Snapshot of the FIFO contents as 6-byte samples, oldest first"""
+        fifo = self._fifo
+        slots = ((self._fifo_head + i) % self.fifo_size for i in range(self._fifo_count))
+        return [bytes(fifo[slot * _FIFO_SAMPLE_BYTES:(slot + 1) * _FIFO_SAMPLE_BYTES])
+                for slot in slots]
+    
+    def _clear_fifo(self):
+        """Discard all samples in the FIFO"""
+        self._fifo_head = 0
+        self._fifo_tail = 0
+        self._fifo_count = 0
+    
     def _update_fifo_pointers(self):
         """Update FIFO write and read pointers"""
-        samples_in_fifo = len(self.fifo_buffer)
+        samples_in_fifo = self._fifo_count
         self.registers[REG_FIFO_WR_PTR] = (samples_in_fifo * 6) % (self.fifo_size * 6)
         
         # Calculate available samples
@@ -181,8 +281,8 @@ class MAX30102Device:
     def _handle_reset(self):
         """Handle device reset"""
         self.logger.info("Device reset triggered")
-        self.registers = DEFAULT_REGISTER_VALUES.copy()
-        self.fifo_buffer.clear()
+        self.registers[:] = _DEFAULT_REGISTERS
+        self._clear_fifo()
         self.sample_count = 0
         self._update_fifo_pointers()
         self.reset_pending = True
@@ -191,7 +291,7 @@ class MAX30102Device:
         """Get current device status"""
         return {
             'power_on': self.power_on,
-            'fifo_samples': len(self.fifo_buffer),
+            'fifo_samples': self._fifo_count,
             'sample_count': self.sample_count,
             'temperature': self.temperature,
             'mode': self.registers[REG_MODE_CONFIG] & 0x07
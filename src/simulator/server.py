@@ -2,30 +2,130 @@ import socket
 import threading
 import json
 import logging
+import selectors
+import struct
 import time
-from typing import Dict, Any, Optional
-from ..models.physiological_model import PhysiologicalModel
+from collections import deque
+import numpy as np
+from typing import Dict, Any, Iterator, Optional
+from models.physiological_model import PhysiologicalModel
 from .max30102_device import MAX30102Device
 from .data_generator import DataGenerator
 
+try:
+    # Optional faster JSON encoder for the sample stream
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY
+    
+    def _encode_message(message: Dict[str, Any]) -> bytes:
+        """Encode a message as a newline-terminated JSON line"""
+        return orjson.dumps(message, option=_ORJSON_OPTIONS)
+else:
+    def _encode_message(message: Dict[str, Any]) -> bytes:
+        """Encode a message as a newline-terminated JSON line"""
+        return (json.dumps(message) + '\n').encode('utf-8')
+
+# Binary stream framing: b'B' + little-endian sample count, then packed samples
+_BINARY_BLOCK_HEADER = struct.Struct('<cI')
+_BINARY_SAMPLE_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('red_ppg', '<u4'),
+    ('ir_ppg', '<u4'),
+    ('heart_rate', '<f4'),
+    ('spO2', '<f4'),
+])
+BINARY_FORMAT = {
+    'block_header': _BINARY_BLOCK_HEADER.format,
+    'block_marker': 'B',
+    'sample': '<dIIff',
+    'fields': list(_BINARY_SAMPLE_DTYPE.names),
+}
+
+class _ClientState:
+    """Per-client streaming state, owned by the server's I/O thread"""
+    
+    __slots__ = ('address', 'pending', 'outbuf', 'inbuf', 'binary', 'dropped_blocks')
+    
+    def __init__(self, address, max_pending: int):
+        self.address = address
+        # Sample blocks queued by the generator thread; the oldest are dropped when full
+        self.pending = deque(maxlen=max_pending)
+        # Bytes the socket has not accepted yet: control messages and blocks
+        # taken from pending, always whole payloads appended at the end
+        self.outbuf = bytearray()
+        # Partial command line received so far
+        self.inbuf = bytearray()
+        # Whether the client switched to the packed binary sample stream
+        self.binary = False
+        # Sample blocks discarded because the client fell behind; only the
+        # generator thread updates it
+        self.dropped_blocks = 0
+    
+    def queue_block(self, payload: bytes):
+        """Queue a sample block, counting the oldest one if it is dropped"""
+        pending = self.pending
+        if len(pending) == pending.maxlen:
+            self.dropped_blocks += 1
+        pending.append(payload)
+    
+    def queue_control(self, payload: bytes):
+        """Buffer a welcome or command response; never dropped, I/O thread only"""
+        self.outbuf += payload
+
 class TCPServer:
     """
     TCP Server for MAX30102 simulator that handles client connections
     and streams physiological data in real-time.
+    
+    A single I/O thread multiplexes the listening socket and all clients
+    with a selector; a generator thread produces sample blocks and queues
+    them on each client's state.
     """
     
-    def __init__(self, host: str = 'localhost', port: int = 8888):
+    # Samples generated per batch by the generator thread
+    BLOCK_SIZE = 256
+    # Generated blocks buffered per client before the oldest is dropped
+    CLIENT_QUEUE_BLOCKS = 8
+    # Kernel send buffer requested for each client socket
+    CLIENT_SEND_BUFFER = 1 << 20
+    # Longest command line accepted before the client is disconnected
+    MAX_COMMAND_BYTES = 64 * 1024
+    
+    def __init__(self, host: str = 'localhost', port: int = 8888,
+                 physio_model: Optional[PhysiologicalModel] = None,
+                 max30102: Optional[MAX30102Device] = None,
+                 data_gen: Optional[DataGenerator] = None):
         self.host = host
         self.port = port
         self.server_socket = None
-        self.clients = []
+        # Connected client sockets and their streaming state
+        self.clients: Dict[socket.socket, _ClientState] = {}
         self.running = False
+        # Immutable snapshot of client states, replaced whenever clients change,
+        # so the generator thread can fan out blocks without taking the lock
+        self._client_states = ()
+        # Serializes changes to self.clients and its snapshot
         self.lock = threading.Lock()
         
-        # Initialize core components
-        self.physio_model = PhysiologicalModel()
-        self.max30102 = MAX30102Device()
-        self.data_gen = DataGenerator(self.physio_model)
+        self.selector = None
+        self._io_thread = None
+        self._generator_thread = None
+        # Socket pair used to wake the I/O thread when data is queued
+        self._wakeup_recv = None
+        self._wakeup_send = None
+        
+        # Encoded welcome message and the model version it was built from
+        self._welcome_cache = b''
+        self._welcome_version = -1
+        
+        # Core components; any not supplied are built here
+        self.physio_model = physio_model if physio_model is not None else PhysiologicalModel()
+        self.max30102 = max30102 if max30102 is not None else MAX30102Device()
+        self.data_gen = data_gen if data_gen is not None else DataGenerator(self.physio_model)
         
         self.setup_logging()
     
@@ -44,18 +144,26 @@ class TCPServer:
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.server_socket.bind((self.host, self.port))
             self.server_socket.listen(5)
-            self.server_socket.settimeout(1.0)
+            self.server_socket.setblocking(False)
+            
+            self._wakeup_recv, self._wakeup_send = socket.socketpair()
+            self._wakeup_recv.setblocking(False)
+            self._wakeup_send.setblocking(False)
+            
+            self.selector = selectors.DefaultSelector()
+            self.selector.register(self.server_socket, selectors.EVENT_READ)
+            self.selector.register(self._wakeup_recv, selectors.EVENT_READ)
             
             self.running = True
             self.logger.info(f"MAX30102 Simulator TCP Server started on {self.host}:{self.port}")
             
-            # Start client acceptance thread
-            accept_thread = threading.Thread(target=self._accept_clients, daemon=True)
-            accept_thread.start()
+            # Start the socket I/O thread
+            self._io_thread = threading.Thread(target=self._serve_io, daemon=True)
+            self._io_thread.start()
             
-            # Start data broadcasting thread
-            broadcast_thread = threading.Thread(target=self._broadcast_data, daemon=True)
-            broadcast_thread.start()
+            # Start data generation thread
+            self._generator_thread = threading.Thread(target=self._generate_data, daemon=True)
+            self._generator_thread.start()
             
             return True
             
@@ -66,78 +174,282 @@ class TCPServer:
     def stop_server(self):
         """Stop the TCP server and clean up resources"""
         self.running = False
-        if self.server_socket:
-            self.server_socket.close()
         
+        # The I/O thread closes all sockets once it sees running is False
+        if self._io_thread is not None:
+            self._wake_io()
+            self._io_thread.join(timeout=2.0)
+            self._io_thread = None
+        if self._generator_thread is not None:
+            self._generator_thread.join(timeout=2.0)
+            self._generator_thread = None
+        
+        self.logger.info("TCP Server stopped")
+    
+    def _serve_io(self):
+        """Accept clients, read commands and flush queued data until stopped"""
+        while self.running:
+            try:
+                events = self.selector.select(timeout=1.0)
+            except OSError as e:
+                self.logger.error(f"Error polling sockets: {e}")
+                break
+            
+            for key, mask in events:
+                sock = key.fileobj
+                if sock is self.server_socket:
+                    self._accept_clients()
+                elif sock is self._wakeup_recv:
+                    self._drain_wakeup()
+                    self._watch_pending_writes()
+                else:
+                    state = key.data
+                    if mask & selectors.EVENT_READ:
+                        self._read_client(sock, state)
+                    if mask & selectors.EVENT_WRITE and sock in self.clients:
+                        self._write_client(sock, state)
+        
+        self._close_sockets()
+    
+    def _close_sockets(self):
+        """Close every client, the listening socket and the selector"""
         with self.lock:
-            for client in self.clients:
-                client.close()
+            clients = list(self.clients)
             self.clients.clear()
+            self._client_states = ()
         
-        self.logger.info("TCP Server stopped")
+        for client_socket in clients:
+            client_socket.close()
+        
+        self.selector.close()
+        self.server_socket.close()
+        self._wakeup_recv.close()
+        self._wakeup_send.close()
     
     def _accept_clients(self):
-        """Accept incoming client connections"""
+        """Accept all pending client connections"""
         while self.running:
             try:
                 client_socket, client_address = self.server_socket.accept()
-                self.logger.info(f"New client connected: {client_address}")
-                
-                with self.lock:
-                    self.clients.append(client_socket)
-                
-                # Send welcome message with current configuration
-                welcome_msg = {
-                    "type": "welcome",
-                    "message": "Connected to MAX30102 Simulator",
-                    "config": self.physio_model.get_current_state()
-                }
-                self._send_to_client(client_socket, welcome_msg)
-                
-            except socket.timeout:
-                continue
-            except Exception as e:
-                if self.running:
-                    self.logger.error(f"Error accepting client: {e}")
+            except BlockingIOError:
+                return
+            except OSError as e:
+                self.logger.error(f"Error accepting client: {e}")
+                return
+            
+            self.logger.info(f"New client connected: {client_address}")
+            self._configure_client_socket(client_socket)
+            client_socket.setblocking(False)
+            
+            state = _ClientState(client_address, self.CLIENT_QUEUE_BLOCKS)
+            self.selector.register(client_socket, selectors.EVENT_READ, state)
+            with self.lock:
+                self.clients[client_socket] = state
+                self._client_states = tuple(self.clients.values())
+            
+            # Send welcome message with current configuration
+            self._queue_to_client(client_socket, self._welcome_bytes())
+    
+    def _welcome_bytes(self) -> bytes:
+        """Encoded welcome message, rebuilt only when the model state changes"""
+        version = self.physio_model.version
+        if version != self._welcome_version:
+            welcome_msg = {
+                "type": "welcome",
+                "message": "Connected to MAX30102 Simulator",
+                "config": self.physio_model.get_current_state(),
+                "binary_format": BINARY_FORMAT
+            }
+            self._welcome_cache = _encode_message(welcome_msg)
+            self._welcome_version = version
+        
+        return self._welcome_cache
     
-    def _broadcast_data(self):
-        """Broadcast physiological data to all connected clients"""
+    def _configure_client_socket(self, client_socket: socket.socket):
+        """Disable Nagle and enlarge the send buffer for a streaming client"""
+        try:
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.CLIENT_SEND_BUFFER)
+        except OSError as e:
+            self.logger.warning(f"Could not configure client socket: {e}")
+    
+    def _generate_data(self):
+        """Generate sample blocks and queue them for every client"""
+        # Monotonic time the next block is due; None restarts the schedule
+        next_block_at = None
         while self.running:
             try:
-                if self.clients:
-                    # Generate new data point
-                    data_point = self.data_gen.generate_data_point()
-                    
-                    # Convert to JSON and send to all clients
-                    data_json = json.dumps(data_point)
-                    
-                    with self.lock:
-                        disconnected_clients = []
-                        for client in self.clients:
-                            try:
-                                client.sendall((data_json + '\n').encode('utf-8'))
-                            except (BrokenPipeError, ConnectionResetError, OSError):
-                                disconnected_clients.append(client)
-                        
-                        # Remove disconnected clients
-                        for client in disconnected_clients:
-                            self.clients.remove(client)
-                            client.close()
-                            self.logger.info("Client disconnected")
+                states = self._client_states
+                if not states:
+                    next_block_at = None
+                    time.sleep(0.01)
+                    continue
+                
+                if next_block_at is None:
+                    # Streaming (re)starts: stamp the next block with the current time
+                    self.data_gen.resync_wall_clock()
+                    next_block_at = time.monotonic()
                 
-                # Control data rate (adjust based on sample rate)
-                time.sleep(0.001)  # ~1000 Hz
+                # Serialize once per wire format and share it between clients
+                block = self.data_gen.generate_block(self.BLOCK_SIZE)
+                payloads = {}
+                for state in states:
+                    binary = state.binary
+                    if binary not in payloads:
+                        payloads[binary] = (self._serialize_block_binary(block) if binary
+                                            else self._serialize_block(block))
+                    state.queue_block(payloads[binary])
+                self._wake_io()
+                
+                # Produce blocks at the generator's sample rate; sleeping until an
+                # absolute deadline keeps the time spent above out of the period
+                next_block_at += self.BLOCK_SIZE / self.data_gen.sample_rate
+                time.sleep(max(0.0, next_block_at - time.monotonic()))
                 
             except Exception as e:
-                self.logger.error(f"Error broadcasting data: {e}")
+                self.logger.error(f"Error generating data: {e}")
+                next_block_at = None
                 time.sleep(0.1)
     
-    def _send_to_client(self, client_socket: socket.socket, message: Dict[str, Any]):
-        """Send a message to a specific client"""
+    def _wake_io(self):
+        """Interrupt the I/O thread's select() so it picks up queued data"""
+        try:
+            self._wakeup_send.send(b'\0')
+        except (BlockingIOError, OSError):
+            # Already has a pending wake-up, or the server is shutting down
+            pass
+    
+    def _drain_wakeup(self):
+        """Discard accumulated wake-up bytes"""
         try:
-            client_socket.sendall((json.dumps(message) + '\n').encode('utf-8'))
-        except (BrokenPipeError, ConnectionResetError, OSError) as e:
-            self.logger.warning(f"Failed to send to client: {e}")
+            while self._wakeup_recv.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+    
+    def _watch_pending_writes(self):
+        """Poll for write readiness on every client with queued data"""
+        for client_socket, state in list(self.clients.items()):
+            if state.pending or state.outbuf:
+                self.selector.modify(client_socket, selectors.EVENT_READ | selectors.EVENT_WRITE, state)
+    
+    def _write_client(self, client_socket: socket.socket, state: _ClientState):
+        """Send as much queued data as the socket accepts without blocking"""
+        outbuf = state.outbuf
+        if not outbuf:
+            while state.pending:
+                outbuf += state.pending.popleft()
+        
+        try:
+            sent = client_socket.send(outbuf)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._remove_client(client_socket)
+            return
+        
+        del outbuf[:sent]
+        if not outbuf and not state.pending:
+            self.selector.modify(client_socket, selectors.EVENT_READ, state)
+    
+    def _read_client(self, client_socket: socket.socket, state: _ClientState):
+        """Read newline-delimited commands from a client"""
+        try:
+            chunk = client_socket.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b''
+        
+        if not chunk:
+            self._remove_client(client_socket)
+            return
+        
+        # Only the new bytes can hold a newline; the buffered part has none
+        inbuf = state.inbuf
+        search_from = len(inbuf)
+        inbuf += chunk
+        start = 0
+        while True:
+            end = inbuf.find(b'\n', search_from)
+            if end == -1:
+                break
+            line = inbuf[start:end]
+            if line.strip():
+                self.handle_client_message(client_socket, line.decode('utf-8', 'replace'))
+            start = search_from = end + 1
+        del inbuf[:start]
+        
+        if len(inbuf) > self.MAX_COMMAND_BYTES:
+            self.logger.warning(f"Client {state.address} sent a command longer than "
+                                f"{self.MAX_COMMAND_BYTES} bytes; disconnecting")
+            self._remove_client(client_socket)
+    
+    def _remove_client(self, client_socket: socket.socket):
+        """Forget a disconnected client and close its socket"""
+        with self.lock:
+            state = self.clients.pop(client_socket, None)
+            self._client_states = tuple(self.clients.values())
+        if state is None:
+            return
+        
+        self.selector.unregister(client_socket)
+        client_socket.close()
+        if state.dropped_blocks:
+            self.logger.warning(f"Client {state.address} disconnected after falling behind; "
+                                f"dropped {state.dropped_blocks} blocks")
+        else:
+            self.logger.info("Client disconnected")
+    
+    @classmethod
+    def _serialize_block(cls, block: Dict[str, Any]) -> bytes:
+        """Encode a sample block as newline-terminated JSON lines"""
+        return b''.join([_encode_message(data_point) for data_point in cls._iter_block_samples(block)])
+    
+    @staticmethod
+    def _serialize_block_binary(block: Dict[str, Any]) -> bytes:
+        """Pack a sample block as a binary frame of little-endian '<dIIff' samples"""
+        samples = np.empty(len(block['timestamp']), dtype=_BINARY_SAMPLE_DTYPE)
+        for field in _BINARY_SAMPLE_DTYPE.names:
+            samples[field] = block[field]
+        
+        return _BINARY_BLOCK_HEADER.pack(b'B', len(samples)) + samples.tobytes()
+    
+    @staticmethod
+    def _iter_block_samples(block: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Split a generated sample block into per-sample data point dicts"""
+        sample_rate = block['sample_rate']
+        activity = block['activity']
+        condition = block['condition']
+        
+        for timestamp, red_ppg, ir_ppg, heart_rate, spo2 in zip(
+                block['timestamp'].tolist(), block['red_ppg'].tolist(),
+                block['ir_ppg'].tolist(), block['heart_rate'].tolist(),
+                block['spO2'].tolist()):
+            yield {
+                'timestamp': timestamp,
+                'red_ppg': red_ppg,
+                'ir_ppg': ir_ppg,
+                'heart_rate': heart_rate,
+                'spO2': spo2,
+                'sample_rate': sample_rate,
+                'activity': activity,
+                'condition': condition
+            }
+    
+    def _send_to_client(self, client_socket: socket.socket, message: Dict[str, Any]):
+        """Queue a control message for a specific client, ahead of its pending blocks"""
+        self._queue_to_client(client_socket, _encode_message(message))
+    
+    def _queue_to_client(self, client_socket: socket.socket, payload: bytes):
+        """Queue already-encoded control bytes for a specific client (I/O thread only)"""
+        state = self.clients.get(client_socket)
+        if state is None:
+            self.logger.warning("Failed to send to client: not connected")
+            return
+        
+        state.queue_control(payload)
+        self.selector.modify(client_socket, selectors.EVENT_READ | selectors.EVENT_WRITE, state)
     
     def handle_client_message(self, client_socket: socket.socket, message: str):
         """
@@ -168,10 +480,17 @@ class TCPServer:
             elif command == 'get_status':
                 response['status'] = {
                     'clients_connected': len(self.clients),
+                    'dropped_blocks': self.clients[client_socket].dropped_blocks,
                     'model_state': self.physio_model.get_current_state(),
                     'sensor_status': self.max30102.get_status()
                 }
             
+            elif command == 'set_binary':
+                enabled = bool(data.get('enabled', True))
+                self.clients[client_socket].binary = enabled
+                response['binary'] = enabled
+                response['binary_format'] = BINARY_FORMAT
+            
             elif command == 'reset':
                 self.physio_model.reset_to_defaults()
                 response['new_state'] = self.physio_model.get_current_state()
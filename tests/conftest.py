@@ -0,0 +1,41 @@
+"""
+Shared fixtures for the simulator tests
+"""
+
+import pytest
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.physiological_model import PhysiologicalModel
+from simulator.data_generator import DataGenerator
+
+# Fields every generated data point must carry
+_DATA_POINT_KEYS = frozenset({'timestamp', 'red_ppg', 'ir_ppg', 'heart_rate',
+                              'spO2', 'activity', 'condition'})
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "integration: end-to-end tests across server, generator and model")
+
+@pytest.fixture(scope="module")
+def _shared_physio_model():
+    """One physiological model per test module"""
+    return PhysiologicalModel()
+
+@pytest.fixture
+def physio_model(_shared_physio_model):
+    """The module's physiological model, reset to defaults after each test"""
+    yield _shared_physio_model
+    _shared_physio_model.reset_to_defaults()
+
+@pytest.fixture
+def data_gen(physio_model):
+    """A fresh, seeded data generator (own sample clock and RNG) on the shared model"""
+    return DataGenerator(physio_model, seed=1234)
+
+@pytest.fixture
+def data_point_keys():
+    """Required keys of a generate_data_point() result"""
+    return _DATA_POINT_KEYS
@@ -6,9 +6,9 @@ Tests the complete system integration from TCP server through
 data generation and physiological modeling.
 """
 
-import time
 import json
 import threading
+import pytest
 from unittest.mock import Mock
 import sys
 import os
@@ -17,20 +17,13 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from simulator.server import TCPServer
-from simulator.data_generator import DataGenerator
-from models.physiological_model import PhysiologicalModel
 
+@pytest.mark.integration
 class TestIntegration:
     """Integration test cases"""
     
-    def test_complete_data_flow(self):
+    def test_complete_data_flow(self, data_gen, data_point_keys):
         """Test complete data flow from model to TCP output"""
-        # Create physiological model
-        physio_model = PhysiologicalModel()
-        
-        # Create data generator
-        data_gen = DataGenerator(physio_model)
-        
         # Generate multiple data points
         data_points = []
         for _ in range(10):
@@ -39,10 +32,7 @@ class TestIntegration:
         
         # Verify data structure and content
         for dp in data_points:
-            assert all(key in dp for key in [
-                'timestamp', 'red_ppg', 'ir_ppg', 'heart_rate', 
-                'spO2', 'activity', 'condition'
-            ])
+            assert data_point_keys <= dp.keys()
             
             # Check data types
             assert isinstance(dp['red_ppg'], int)
@@ -50,29 +40,17 @@ class TestIntegration:
             assert isinstance(dp['heart_rate'], float)
             assert isinstance(dp['spO2'], float)
     
-    def test_scenario_transitions(self):
+    def test_scenario_transitions(self, physio_model, data_gen):
         """Test smooth transitions between scenarios"""
-        physio_model = PhysiologicalModel()
-        data_gen = DataGenerator(physio_model)
-        
         scenarios = ['normal_resting', 'walking', 'running', 'heart_attack']
         hr_values = {}
         
         for scenario in scenarios:
             # Apply scenario
-            physio_model.set_scenario(scenario)
-            time.sleep(0.1)  # Allow model to stabilize
-            
-            # Generate samples and record average HR
-            hr_sum = 0
-            sample_count = 10
-            
-            for _ in range(sample_count):
-                data_point = data_gen.generate_data_point()
-                hr_sum += data_point['heart_rate']
-                time.sleep(0.01)
+            assert physio_model.set_scenario(scenario)
             
-            hr_values[scenario] = hr_sum / sample_count
+            # Generate samples and record average HR (column 2)
+            hr_values[scenario] = float(data_gen.generate_data_points(10)[:, 2].mean())
         
         # Verify physiological responses
         assert hr_values['walking'] > hr_values['normal_resting']
@@ -82,20 +60,19 @@ class TestIntegration:
     def test_tcp_server_initialization(self):
         """Test TCP server initialization and basic functionality"""
         # Note: This test doesn't actually start the server to avoid port conflicts
-        server = TCPServer(host='localhost', port=8888)
-        
-        # Verify components are initialized
-        assert server.physio_model is not None
-        assert server.max30102 is not None
-        assert server.data_gen is not None
+        physio_model, max30102, data_gen = Mock(), Mock(), Mock()
+        server = TCPServer(host='localhost', port=8888, physio_model=physio_model,
+                           max30102=max30102, data_gen=data_gen)
+        
+        # Verify the supplied components are wired in
+        assert server.physio_model is physio_model
+        assert server.max30102 is max30102
+        assert server.data_gen is data_gen
         assert server.host == 'localhost'
         assert server.port == 8888
     
-    def test_real_time_parameter_updates(self):
+    def test_real_time_parameter_updates(self, physio_model, data_gen):
         """Test real-time parameter updates during data generation"""
-        physio_model = PhysiologicalModel()
-        data_gen = DataGenerator(physio_model)
-        
         # Start with normal parameters
         initial_data = data_gen.generate_data_point()
         initial_hr = initial_data['heart_rate']
@@ -106,9 +83,6 @@ class TestIntegration:
             'heart_rate_bpm': 150
         })
         
-        # Allow some time for the generator to update
-        time.sleep(0.1)
-        
         # Generate new data
         updated_data = data_gen.generate_data_point()
         updated_hr = updated_data['heart_rate']
@@ -116,10 +90,8 @@ class TestIntegration:
         # Should reflect the updated parameters
         assert abs(updated_hr - 150) < 10  # Allow some algorithmic variation
     
-    def test_error_handling(self):
+    def test_error_handling(self, physio_model):
         """Test error handling in the system"""
-        physio_model = PhysiologicalModel()
-        
         # Test invalid parameter update
         success = physio_model.update_parameters({
             'invalid_parameter': 'invalid_value',  # This should be ignored
@@ -5,40 +5,29 @@ Tests for Data Generator
 import pytest
 import sys
 import os
+import time
+import numpy as np
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from simulator.data_generator import DataGenerator
-from models.physiological_model import PhysiologicalModel
 
 class TestDataGenerator:
     """Test cases for DataGenerator class"""
     
-    def test_data_generator_initialization(self):
+    def test_data_generator_initialization(self, physio_model, data_gen):
         """Test data generator initialization"""
-        physio_model = PhysiologicalModel()
-        generator = DataGenerator(physio_model)
-        
-        assert generator.physio_model == physio_model
-        assert generator.sample_rate == 1000
-        assert generator.time_index == 0.0
+        assert data_gen.physio_model == physio_model
+        assert data_gen.sample_rate == 1000
+        assert data_gen.time_index == 0.0
     
-    def test_data_point_generation(self):
+    def test_data_point_generation(self, data_gen, data_point_keys):
         """Test generating individual data points"""
-        physio_model = PhysiologicalModel()
-        generator = DataGenerator(physio_model)
-        
-        data_point = generator.generate_data_point()
+        data_point = data_gen.generate_data_point()
         
         # Check required fields
-        assert 'timestamp' in data_point
-        assert 'red_ppg' in data_point
-        assert 'ir_ppg' in data_point
-        assert 'heart_rate' in data_point
-        assert 'spO2' in data_point
-        assert 'activity' in data_point
-        assert 'condition' in data_point
+        assert data_point_keys <= data_point.keys()
         
         # Check data types and reasonable ranges
         assert isinstance(data_point['red_ppg'], int)
@@ -56,80 +45,89 @@ class TestDataGenerator:
         # SpO2 should be in reasonable range
         assert 70 <= data_point['spO2'] <= 100
     
-    def test_ppg_waveform_generation(self):
+    def test_ppg_waveform_generation(self, data_gen):
         """Test PPG waveform generation"""
-        physio_model = PhysiologicalModel()
-        generator = DataGenerator(physio_model)
-        
         # Generate multiple samples to check waveform pattern
-        samples_red = []
-        samples_ir = []
-        
-        for _ in range(100):  # Generate 100 samples
-            data_point = generator.generate_data_point()
-            samples_red.append(data_point['red_ppg'])
-            samples_ir.append(data_point['ir_ppg'])
+        samples_red, samples_ir = data_gen.generate_data_points(100)[:, :2].T
         
         # Should have some variation (not constant)
-        assert len(set(samples_red)) > 1
-        assert len(set(samples_ir)) > 1
+        assert np.unique(samples_red).size > 1
+        assert np.unique(samples_ir).size > 1
         
         # Red and IR should be correlated but not identical
-        assert samples_red != samples_ir
+        assert np.any(samples_red != samples_ir)
     
-    def test_motion_artifact_simulation(self):
+    def test_motion_artifact_simulation(self, physio_model, data_gen):
         """Test motion artifact generation"""
-        physio_model = PhysiologicalModel()
-        
         # Set high probability for motion artifacts
         physio_model.update_parameters({
             'motion_artifact_probability': 1.0,
             'noise_level': 0.01  # Low noise to see artifacts clearly
         })
         
-        generator = DataGenerator(physio_model)
-        
-        # Generate samples and check for artifacts
-        samples_with_artifacts = 0
-        baseline_red = generator.baseline_red
+        # With probability 1.0 an artifact starts on the first sample;
+        # 50 ms is enough for its waveform to clear the threshold
+        baseline_red = data_gen.baseline_red
+        samples_red = data_gen.generate_data_points(50)[:, 0]
         
-        for _ in range(200):  # Generate enough samples to likely get artifacts
-            data_point = generator.generate_data_point()
-            red_ppg = data_point['red_ppg']
-            
-            # Check for significant deviation from baseline (possible artifact)
-            if abs(red_ppg - baseline_red) > generator.pulse_amplitude_red * 0.3:
-                samples_with_artifacts += 1
+        # Check for significant deviation from baseline (possible artifact)
+        samples_with_artifacts = np.count_nonzero(
+            np.abs(samples_red - baseline_red) > data_gen.pulse_amplitude_red * 0.3)
         
         # Should have detected some motion artifacts
         assert samples_with_artifacts > 0
     
-    def test_noise_addition(self):
+    def test_noise_addition(self, physio_model, data_gen):
         """Test that noise is properly added to signals"""
-        physio_model = PhysiologicalModel()
-        
         # Set specific noise level
         physio_model.update_parameters({
             'noise_level': 0.1
         })
         
-        generator = DataGenerator(physio_model)
-        
         # Generate multiple samples with same parameters
-        samples = []
-        for _ in range(50):
-            data_point = generator.generate_data_point()
-            samples.append(data_point['red_ppg'])
+        samples = data_gen.generate_data_points(50)[:, 0]
         
         # Should have variation due to noise
-        sample_variance = max(samples) - min(samples)
+        sample_variance = np.ptp(samples)
         assert sample_variance > 0
     
-    def test_vital_sign_calculation(self):
+    @pytest.mark.parametrize("motion_probability", [0.0, 1.0])
+    def test_scalar_path_matches_block_path(self, physio_model, motion_probability):
+        """Test that generate_data_point tracks generate_data_points sample for sample"""
+        physio_model.update_parameters({'motion_artifact_probability': motion_probability})
+        scalar_gen = DataGenerator(physio_model, seed=11)
+        block_gen = DataGenerator(physio_model, seed=11)
+        # Without sensor noise red/IR are deterministic: an artifact starting on
+        # the first sample lasts at least 100 ms, so it spans all 50 samples
+        scalar_gen.noise_level = block_gen.noise_level = 0.0
+        
+        points = [scalar_gen.generate_data_point() for _ in range(50)]
+        scalar = np.array([[p['red_ppg'], p['ir_ppg'], p['heart_rate'], p['spO2']] for p in points])
+        block = block_gen.generate_data_points(50)
+        
+        assert scalar[:, :2] == pytest.approx(block[:, :2], abs=1)
+        assert scalar[:, 2].mean() == pytest.approx(block[:, 2].mean(), abs=1.0)
+        assert scalar[:, 3].mean() == pytest.approx(block[:, 3].mean(), abs=0.5)
+        assert scalar_gen.time_index == pytest.approx(block_gen.time_index)
+    
+    def test_scalar_noise_matches_block_noise(self, physio_model):
+        """Test that both generation paths add sensor noise of the same size"""
+        physio_model.update_parameters({'noise_level': 0.1, 'motion_artifact_probability': 0.0})
+        clean = DataGenerator(physio_model, seed=5)
+        clean.noise_level = 0.0
+        reference = clean.generate_data_points(200)[:, 0]
+        
+        scalar_gen = DataGenerator(physio_model, seed=5)
+        scalar = np.array([scalar_gen.generate_data_point()['red_ppg'] for _ in range(200)])
+        block = DataGenerator(physio_model, seed=6).generate_data_points(200)[:, 0]
+        
+        scalar_noise = np.std(scalar - reference)
+        block_noise = np.std(block - reference)
+        assert scalar_noise > 0
+        assert scalar_noise == pytest.approx(block_noise, rel=0.3)
+    
+    def test_vital_sign_calculation(self, physio_model, data_gen):
         """Test heart rate and SpO2 calculation"""
-        physio_model = PhysiologicalModel()
-        generator = DataGenerator(physio_model)
-        
         # Test with known parameters
         test_hr = 80.0
         test_spo2 = 97.5
@@ -139,21 +137,71 @@ class TestDataGenerator:
             'spo2_percent': test_spo2
         })
         
-        data_point = generator.generate_data_point()
+        data_point = data_gen.generate_data_point()
         
         # Calculated values should be close to model values
         assert abs(data_point['heart_rate'] - test_hr) < 10  # Allow some variation
         assert abs(data_point['spO2'] - test_spo2) < 5       # Allow some variation
     
-    def test_sample_rate_configuration(self):
-        """Test sample rate configuration"""
-        physio_model = PhysiologicalModel()
-        generator = DataGenerator(physio_model)
+    def test_block_generation(self, data_gen):
+        """Test generating a block of samples at once"""
+        block = data_gen.generate_block(256)
         
+        for key in ('timestamp', 'red_ppg', 'ir_ppg', 'heart_rate', 'spO2'):
+            assert len(block[key]) == 256
+        
+        # PPG values should be positive and vary over the block
+        assert (block['red_ppg'] > 0).all()
+        assert (block['ir_ppg'] > 0).all()
+        assert len(set(block['red_ppg'].tolist())) > 1
+        
+        # Sample clock advances by one block
+        assert data_gen.time_index == pytest.approx(256 / data_gen.sample_rate)
+        
+        assert ((block['heart_rate'] >= 30) & (block['heart_rate'] <= 220)).all()
+        assert ((block['spO2'] >= 70) & (block['spO2'] <= 100)).all()
+    
+    def test_parameters_follow_model_updates(self, physio_model, data_gen):
+        """Test that generator parameters are re-read after model changes"""
+        physio_model.update_parameters({'activity': 'running'})
+        data_gen.generate_block(16)
+        
+        assert data_gen.heart_rate == physio_model.state.heart_rate_bpm
+        assert data_gen.noise_level == physio_model.state.noise_level
+        
+        physio_model.reset_to_defaults()
+        data_gen.generate_data_point()
+        
+        assert data_gen.heart_rate == physio_model.state.heart_rate_bpm
+    
+    def test_wall_clock_resync_after_idle(self, data_gen, monkeypatch):
+        """Test that timestamps catch up with the wall clock after a pause"""
+        first = data_gen.generate_block(16)['timestamp']
+        
+        # Pretend generation paused for a minute
+        resumed = time.time() + 60.0
+        monkeypatch.setattr(time, 'time', lambda: resumed)
+        data_gen.resync_wall_clock()
+        timestamps = data_gen.generate_block(16)['timestamp']
+        
+        assert timestamps[0] == pytest.approx(resumed)
+        assert timestamps[0] > first[-1]
+        assert np.diff(timestamps) == pytest.approx(1.0 / data_gen.sample_rate, abs=1e-6)
+    
+    def test_sample_rate_configuration(self, data_gen):
+        """Test sample rate configuration"""
         new_sample_rate = 500
-        generator.set_sample_rate(new_sample_rate)
+        data_gen.set_sample_rate(new_sample_rate)
+        
+        assert data_gen.sample_rate == new_sample_rate
+    
+    def test_seeded_generators_match(self, physio_model):
+        """Test that generators with the same seed produce the same samples"""
+        physio_model.update_parameters({'motion_artifact_probability': 0.5})
+        first = DataGenerator(physio_model, seed=7).generate_data_points(64)
+        second = DataGenerator(physio_model, seed=7).generate_data_points(64)
         
-        assert generator.sample_rate == new_sample_rate
+        assert np.array_equal(first, second)
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
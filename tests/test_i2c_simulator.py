@@ -5,6 +5,7 @@ Tests for I2C Protocol Simulator
 import pytest
 import sys
 import os
+import numpy as np
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -87,14 +88,30 @@ class TestI2CProtocolSimulator:
         """Test FIFO overflow handling"""
         i2c = I2CProtocolSimulator()
         
-        # Fill FIFO beyond capacity
-        for i in range(i2c.fifo_size + 5):
-            i2c.push_sample_to_fifo(10000 + i, 9500 + i)
+        # Fill FIFO beyond capacity in one burst
+        red = np.arange(i2c.fifo_size + 5, dtype=np.uint32) + 10000
+        assert i2c.push_samples_bulk(red, red - 500) == red.size
         
         # Should have overflow counter incremented
         assert i2c.registers[REG_OVF_COUNTER] > 0
         assert len(i2c.fifo_buffer) <= i2c.fifo_size
     
+    def test_bulk_fifo_push(self):
+        """Test bulk FIFO push matches per-sample pushes"""
+        single = I2CProtocolSimulator()
+        bulk = I2CProtocolSimulator()
+        
+        red = np.arange(10000, 10000 + single.fifo_size + 5, dtype=np.uint32)
+        ir = red - 500
+        
+        for red_sample, ir_sample in zip(red, ir):
+            single.push_sample_to_fifo(int(red_sample), int(ir_sample))
+        pushed = bulk.push_samples_bulk(red, ir)
+        
+        assert pushed == len(red)
+        assert bulk.registers[REG_OVF_COUNTER] == single.registers[REG_OVF_COUNTER]
+        assert bulk.read_fifo_samples(bulk.fifo_size) == single.read_fifo_samples(single.fifo_size)
+    
     def test_device_reset(self):
         """Test device reset via I2C command"""
         i2c = I2CProtocolSimulator()
@@ -120,37 +137,66 @@ class TestI2CProtocolSimulator:
     
     def test_communication_delay(self):
         """Test communication delay simulation"""
-        i2c = I2CProtocolSimulator()
+        import types
+        
+        # Simulated clock that only advances when the simulator sleeps
+        fake = types.SimpleNamespace(now=0.0, total=0.0)
+        
+        def fake_sleep(seconds):
+            fake.now += seconds
+            fake.total += seconds
         
-        import time
+        i2c = I2CProtocolSimulator(clock=lambda: fake.now, sleep=fake_sleep)
         
         # Set a measurable delay
         test_delay = 0.01  # 10ms
         i2c.set_communication_delay(test_delay)
         
-        start_time = time.time()
-        
-        # Perform multiple operations
+        # Perform multiple operations back to back
         for _ in range(5):
             i2c.write_register(REG_LED1_PA, 0x20)
             i2c.read_register(REG_LED1_PA)
         
-        elapsed_time = time.time() - start_time
+        # Each operation after the first waited for the previous one to clear the bus
+        assert fake.total == pytest.approx(9 * test_delay)  # 5 writes + 5 reads
+        
+        # Once the last transfer has cleared the bus, the next one starts at once
+        fake.now += test_delay
+        waited = fake.total
+        i2c.read_register(REG_LED1_PA)
+        assert fake.total == waited
+    
+    def test_burst_delay_sleeps_once(self):
+        """Test that a burst occupies the bus once for its whole byte count"""
+        sleeps = []
+        i2c = I2CProtocolSimulator(clock=lambda: sum(sleeps), sleep=sleeps.append)
+        
+        test_delay = 0.001
+        i2c.set_communication_delay(test_delay)
+        
+        i2c.write_registers_burst(REG_LED1_PA, [0x20, 0x30])
+        i2c.read_registers_burst(REG_LED1_PA, 6)
+        i2c.read_register(REG_LED1_PA)
         
-        # Should have taken at least the total delay time
-        expected_min_time = 10 * test_delay  # 5 writes + 5 reads
-        assert elapsed_time >= expected_min_time
+        # Each follow-up waits once for the whole preceding burst to clear the bus
+        assert sleeps == [pytest.approx(2 * test_delay), pytest.approx(6 * test_delay)]
     
-    def test_sample_rate_configuration(self):
+    @pytest.mark.parametrize("sr_bits,expected_rate", [
+        (SPO2_SR_50, 50),
+        (SPO2_SR_100, 100),
+        (SPO2_SR_400, 400),
+        (SPO2_SR_1000, 1000),
+        (SPO2_SR_3200, 3200),
+    ])
+    def test_sample_rate_configuration(self, sr_bits, expected_rate):
         """Test sample rate configuration via registers"""
         i2c = I2CProtocolSimulator()
         
-        # Configure for 1000 samples/sec
-        spo2_config = (SPO2_SR_1000 << 2) | (SPO2_ADC_RANGE_4096 << 5) | LED_PW_411
+        spo2_config = (sr_bits << 2) | (SPO2_ADC_RANGE_4096 << 5) | LED_PW_411
         i2c.write_register(REG_SPO2_CONFIG, spo2_config)
         
         status = i2c.get_device_status()
-        assert status['sample_rate'] == 1000
+        assert status['sample_rate'] == expected_rate
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -5,6 +5,7 @@ Tests for MAX30102 Device Simulator
 import pytest
 import sys
 import os
+import numpy as np
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -55,13 +56,30 @@ class TestMAX30102Device:
         assert status['fifo_samples'] == 2
         
         # Test FIFO overflow
-        for i in range(40):  # More than FIFO size
-            device.push_sample_to_fifo(10000 + i, 9500 + i)
+        red = np.arange(40, dtype=np.uint32) + 10000  # More than FIFO size
+        device.push_samples_bulk(red, red - 500)
         
         status = device.get_status()
         assert status['fifo_samples'] <= device.fifo_size
         assert device.registers[REG_OVF_COUNTER] > 0  # Should have overflows
     
+    def test_bulk_fifo_push(self):
+        """Test bulk FIFO push matches per-sample pushes"""
+        single = MAX30102Device()
+        bulk = MAX30102Device()
+        
+        red = np.arange(10000, 10000 + single.fifo_size + 5, dtype=np.uint32)
+        ir = red - 500
+        
+        for red_sample, ir_sample in zip(red, ir):
+            single.push_sample_to_fifo(int(red_sample), int(ir_sample))
+        pushed = bulk.push_samples_bulk(red, ir)
+        
+        assert pushed == len(red)
+        assert bulk.sample_count == single.sample_count
+        assert bulk.registers[REG_OVF_COUNTER] == single.registers[REG_OVF_COUNTER]
+        assert bulk.read_fifo_burst(bulk.fifo_size) == single.read_fifo_burst(single.fifo_size)
+    
     def test_device_reset(self):
         """Test device reset functionality"""
         device = MAX30102Device()
@@ -78,27 +96,25 @@ class TestMAX30102Device:
         assert device.registers[REG_LED2_PA] == DEFAULT_REGISTER_VALUES[REG_LED2_PA]
         assert len(device.fifo_buffer) == 0
     
-    def test_sample_rate_calculation(self):
+    # Test different sample rate configurations
+    @pytest.mark.parametrize("sr_bits,expected_rate", [
+        (SPO2_SR_50, 50),
+        (SPO2_SR_100, 100),
+        (SPO2_SR_200, 200),
+        (SPO2_SR_400, 400),
+        (SPO2_SR_800, 800),
+        (SPO2_SR_1000, 1000),
+    ])
+    def test_sample_rate_calculation(self, sr_bits, expected_rate):
         """Test sample rate calculation from configuration"""
         device = MAX30102Device()
         
-        # Test different sample rate configurations
-        sample_rates = [
-            (SPO2_SR_50, 50),
-            (SPO2_SR_100, 100),
-            (SPO2_SR_200, 200),
-            (SPO2_SR_400, 400),
-            (SPO2_SR_800, 800),
-            (SPO2_SR_1000, 1000),
-        ]
-        
-        for sr_bits, expected_rate in sample_rates:
-            # Configure sample rate
-            spo2_config = (sr_bits << 2) | (SPO2_ADC_RANGE_4096 << 5) | LED_PW_411
-            device.write_register(REG_SPO2_CONFIG, spo2_config)
-            
-            calculated_rate = device.get_sample_rate()
-            assert calculated_rate == expected_rate
+        # Configure sample rate
+        spo2_config = (sr_bits << 2) | (SPO2_ADC_RANGE_4096 << 5) | LED_PW_411
+        device.write_register(REG_SPO2_CONFIG, spo2_config)
+        
+        calculated_rate = device.get_sample_rate()
+        assert calculated_rate == expected_rate
     
     def test_power_management(self):
         """Test device power on/off functionality"""
@@ -9,16 +9,15 @@ import os
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from models.physiological_model import PhysiologicalModel, PhysiologicalState
+from models.physiological_model import PhysiologicalState
 from models.scenarios import ScenarioManager
 
 class TestPhysiologicalModel:
     """Test cases for PhysiologicalModel class"""
     
-    def test_initial_state(self):
+    def test_initial_state(self, physio_model):
         """Test that model initializes with correct default state"""
-        model = PhysiologicalModel()
-        state = model.get_current_state()
+        state = physio_model.get_current_state()
         
         assert state['age'] == 30
         assert state['gender'] == 'male'
@@ -26,12 +25,10 @@ class TestPhysiologicalModel:
         assert state['condition'] == 'normal'
         assert 60 <= state['heart_rate_bpm'] <= 80  # Reasonable resting HR
     
-    def test_parameter_update(self):
+    def test_parameter_update(self, physio_model):
         """Test updating physiological parameters"""
-        model = PhysiologicalModel()
-        
         # Update parameters
-        success = model.update_parameters({
+        success = physio_model.update_parameters({
             'age': 25,
             'gender': 'female',
             'activity': 'walking'
@@ -39,101 +36,115 @@ class TestPhysiologicalModel:
         
         assert success == True
         
-        state = model.get_current_state()
+        state = physio_model.get_current_state()
         assert state['age'] == 25
         assert state['gender'] == 'female'
         assert state['activity'] == 'walking'
     
-    def test_scenario_application(self):
+    def test_batch_update(self, physio_model):
+        """Test that batched updates recalculate once on exit"""
+        initial_hr = physio_model.state.heart_rate_bpm
+        
+        with physio_model.batch_update():
+            physio_model.update_parameters({'activity': 'running'})
+            physio_model.update_parameters({'fitness_level': 'sedentary'})
+            
+            # Dependent values are not recalculated inside the batch
+            assert physio_model.state.heart_rate_bpm == initial_hr
+        
+        state = physio_model.get_current_state()
+        assert state['activity'] == 'running'
+        assert state['heart_rate_bpm'] > initial_hr
+    
+    def test_scenario_application(self, physio_model):
         """Test applying pre-defined scenarios"""
-        model = PhysiologicalModel()
-        
         # Apply running scenario
-        success = model.set_scenario('running')
+        success = physio_model.set_scenario('running')
         assert success == True
         
-        state = model.get_current_state()
+        state = physio_model.get_current_state()
         assert state['heart_rate_bpm'] > 100  # Running should increase HR
         assert state['condition'] == 'running'
     
-    def test_emergency_scenarios(self):
+    def test_emergency_scenarios(self, physio_model):
         """Test emergency medical scenarios"""
-        model = PhysiologicalModel()
-        
         # Test heart attack scenario
-        model.set_scenario('heart_attack')
-        state = model.get_current_state()
+        physio_model.set_scenario('heart_attack')
+        state = physio_model.get_current_state()
         
         assert state['heart_rate_bpm'] < 60  # Bradycardia in heart attack
         assert state['spo2_percent'] < 90    # Low oxygen saturation
         assert state['pulse_quality'] == 'weak'
     
-    def test_physiological_ranges(self):
+    def test_physiological_ranges(self, physio_model):
         """Test that parameters stay within physiological ranges"""
-        model = PhysiologicalModel()
-        
         # Try to set extreme values
-        model.update_parameters({
+        physio_model.update_parameters({
             'heart_rate_bpm': 500,  # Impossible value
             'spo2_percent': 200,    # Impossible value
             'respiratory_rate': 100 # Impossible value
         })
         
-        state = model.get_current_state()
+        state = physio_model.get_current_state()
         
         # Should be clamped to reasonable ranges
         assert state['heart_rate_bpm'] <= 220
         assert state['spo2_percent'] <= 100
         assert state['respiratory_rate'] <= 60
     
-    def test_stress_response(self):
+    def test_stress_response(self, physio_model):
         """Test stress response simulation"""
-        model = PhysiologicalModel()
-        
-        initial_hr = model.state.heart_rate_bpm
+        initial_hr = physio_model.state.heart_rate_bpm
         
         # Apply moderate stress
-        model.simulate_stress_response(0.5)
+        physio_model.simulate_stress_response(0.5)
         
-        new_hr = model.state.heart_rate_bpm
+        new_hr = physio_model.state.heart_rate_bpm
         assert new_hr > initial_hr  # Stress should increase HR
     
-    def test_reset_functionality(self):
+    def test_reset_functionality(self, physio_model):
         """Test reset to default values"""
-        model = PhysiologicalModel()
-        
         # Change some parameters
-        model.update_parameters({
+        physio_model.update_parameters({
             'age': 45,
             'activity': 'running',
             'condition': 'heart_attack'
         })
         
         # Reset to defaults
-        model.reset_to_defaults()
+        physio_model.reset_to_defaults()
         
-        state = model.get_current_state()
+        state = physio_model.get_current_state()
         assert state['age'] == 30
         assert state['activity'] == 'resting'
         assert state['condition'] == 'normal'
 
+@pytest.fixture(scope="class")
+def manager():
+    """One scenario library shared by the read-only ScenarioManager tests"""
+    return ScenarioManager()
+
+@pytest.fixture
+def scratch_manager(manager):
+    """A throwaway manager over a copy of the shared library, for mutating tests"""
+    scratch = ScenarioManager()
+    scratch.scenarios = manager.get_all_scenarios(copy=True)
+    return scratch
+
 class TestScenarioManager:
     """Test cases for ScenarioManager class"""
     
-    def test_scenario_loading(self):
+    def test_scenario_loading(self, manager):
         """Test that scenarios load correctly"""
-        manager = ScenarioManager()
-        scenarios = manager.get_all_scenarios()
+        names = manager.get_scenario_names()
         
-        assert len(scenarios) > 0
-        assert 'normal_resting' in scenarios
-        assert 'heart_attack' in scenarios
-        assert 'running' in scenarios
+        assert len(names) > 0
+        assert 'normal_resting' in names
+        assert 'heart_attack' in names
+        assert 'running' in names
     
-    def test_scenario_retrieval(self):
+    def test_scenario_retrieval(self, manager):
         """Test retrieving specific scenarios"""
-        manager = ScenarioManager()
-        
         scenario = manager.get_scenario('normal_resting')
         assert scenario is not None
         assert 'description' in scenario
@@ -143,21 +154,17 @@ class TestScenarioManager:
         scenario = manager.get_scenario('non_existent')
         assert scenario is None
     
-    def test_scenario_filtering(self):
+    def test_scenario_filtering(self, manager):
         """Test filtering scenarios by type"""
-        manager = ScenarioManager()
-        
         emergency_scenarios = manager.get_scenarios_by_type('emergency')
         assert len(emergency_scenarios) >= 4  # heart_attack, anxiety, shock, fear
         
         activity_scenarios = manager.get_scenarios_by_type('activity')
         assert len(activity_scenarios) >= 4   # walking, running, sleeping, sex
     
-    def test_custom_scenario_creation(self):
+    def test_custom_scenario_creation(self, scratch_manager):
         """Test creating custom scenarios"""
-        manager = ScenarioManager()
-        
-        success = manager.create_custom_scenario(
+        success = scratch_manager.create_custom_scenario(
             name='test_scenario',
             description='Test scenario for unit testing',
             physiological_params={
@@ -168,15 +175,13 @@ class TestScenarioManager:
         )
         
         assert success == True
-        assert 'test_scenario' in manager.get_scenario_names()
+        assert 'test_scenario' in scratch_manager.get_scenario_names()
         
         # Clean up
-        manager.delete_scenario('test_scenario')
+        scratch_manager.delete_scenario('test_scenario')
     
-    def test_scenario_validation(self):
+    def test_scenario_validation(self, manager):
         """Test scenario parameter validation"""
-        manager = ScenarioManager()
-        
         # Test valid parameters
         valid_params = {
             'heart_rate_bpm': 80,
@@ -196,6 +201,25 @@ class TestScenarioManager:
         
         errors = manager.validate_scenario_parameters(invalid_params)
         assert len(errors) > 0
+    
+    def test_filtering_tracks_library_changes(self, scratch_manager):
+        """Test type filtering and statistics after the library is modified"""
+        activity_count = len(scratch_manager.get_scenarios_by_type('activity'))
+        stats = scratch_manager.get_scenario_statistics()
+        
+        scratch_manager.create_custom_scenario(
+            name='walking_uphill',
+            description='Brisk uphill walk',
+            physiological_params={'heart_rate_bpm': 215}
+        )
+        
+        assert 'walking_uphill' in scratch_manager.get_scenarios_by_type('activity')
+        assert 'walking_uphill' in scratch_manager.get_scenario_names()
+        assert len(scratch_manager.get_scenarios_by_type('activity')) == activity_count + 1
+        
+        new_stats = scratch_manager.get_scenario_statistics()
+        assert new_stats['total_scenarios'] == stats['total_scenarios'] + 1
+        assert new_stats['heart_rate_range'][1] == 215
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+Tests for the TCP server: client streaming state and a loopback session
+"""
+
+import json
+import socket
+import struct
+import time
+import pytest
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from simulator.server import TCPServer, BINARY_FORMAT, _ClientState
+
+class TestClientState:
+    """Test cases for per-client queueing"""
+    
+    def test_only_sample_blocks_are_dropped(self):
+        """Test that a lagging client loses old blocks but no control messages"""
+        state = _ClientState(('127.0.0.1', 0), max_pending=2)
+        
+        state.queue_control(b'{"type":"welcome"}\n')
+        for i in range(5):
+            state.queue_block(b'block%d' % i)
+        state.queue_control(b'{"type":"command_response"}\n')
+        
+        # Oldest blocks are evicted and counted; control messages stay buffered
+        assert list(state.pending) == [b'block3', b'block4']
+        assert state.dropped_blocks == 3
+        assert bytes(state.outbuf) == b'{"type":"welcome"}\n{"type":"command_response"}\n'
+
+class _FrameReader:
+    """Reads JSON lines and binary sample blocks from a client socket"""
+    
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = b''
+    
+    def _fill(self, size):
+        """Receive until at least size bytes are buffered"""
+        while len(self.buffer) < size:
+            chunk = self.sock.recv(65536)
+            assert chunk, "server closed the connection"
+            self.buffer += chunk
+    
+    def _take(self, size):
+        """Remove and return the next size bytes"""
+        self._fill(size)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+    
+    def read_frame(self):
+        """Return ('json', message) or ('binary', (header, payload))"""
+        self._fill(1)
+        if self.buffer[:1] == b'B':
+            header = struct.unpack(BINARY_FORMAT['block_header'],
+                                   self._take(struct.calcsize(BINARY_FORMAT['block_header'])))
+            payload = self._take(header[1] * struct.calcsize(BINARY_FORMAT['sample']))
+            return 'binary', (header, payload)
+        while b'\n' not in self.buffer:
+            self._fill(len(self.buffer) + 1)
+        line, self.buffer = self.buffer.split(b'\n', 1)
+        return 'json', json.loads(line)
+    
+    def read_response(self, command, limit=10000):
+        """Skip sample frames until the response to command arrives"""
+        for _ in range(limit):
+            kind, frame = self.read_frame()
+            if kind == 'json' and frame.get('type') == 'command_response' and frame['command'] == command:
+                return frame
+        raise AssertionError(f"no response to {command}")
+
+@pytest.mark.integration
+class TestServerLoopback:
+    """End-to-end test of a client session over a loopback socket"""
+    
+    def test_command_session(self, physio_model, data_gen):
+        """Test welcome, get_status, set_binary framing and a clean shutdown"""
+        server = TCPServer(host='127.0.0.1', port=0, physio_model=physio_model, data_gen=data_gen)
+        assert server.start_server()
+        io_thread, generator_thread = server._io_thread, server._generator_thread
+        
+        try:
+            port = server.server_socket.getsockname()[1]
+            with socket.create_connection(('127.0.0.1', port), timeout=5.0) as client:
+                reader = _FrameReader(client)
+                
+                # The welcome is the first frame on the connection
+                kind, welcome = reader.read_frame()
+                assert kind == 'json'
+                assert welcome['type'] == 'welcome'
+                assert welcome['binary_format'] == BINARY_FORMAT
+                
+                client.sendall(b'{"command": "get_status"}\n')
+                response = reader.read_response('get_status')
+                assert response['success'] is True
+                assert response['status']['clients_connected'] == 1
+                assert response['status']['dropped_blocks'] == 0
+                
+                client.sendall(b'{"command": "set_binary", "enabled": true}\n')
+                response = reader.read_response('set_binary')
+                assert response['success'] is True
+                assert response['binary'] is True
+                
+                # JSON blocks generated before the switch may still arrive first
+                for _ in range(10000):
+                    kind, frame = reader.read_frame()
+                    if kind == 'binary':
+                        break
+                assert kind == 'binary'
+                
+                (marker, count), payload = frame
+                assert marker == b'B'
+                assert count == TCPServer.BLOCK_SIZE
+                samples = list(struct.iter_unpack(BINARY_FORMAT['sample'], payload))
+                assert len(samples) == count
+                
+                timestamps = [sample[0] for sample in samples]
+                assert timestamps == sorted(timestamps)
+                for _, red_ppg, ir_ppg, heart_rate, spo2 in samples:
+                    assert red_ppg > 0 and ir_ppg > 0
+                    assert 30 <= heart_rate <= 220
+                    assert 70 <= spo2 <= 100
+        finally:
+            server.stop_server()
+        
+        assert not io_thread.is_alive()
+        assert not generator_thread.is_alive()
+        assert server.server_socket.fileno() == -1
+    
+    def test_timestamps_follow_wall_clock_after_idle(self, physio_model, data_gen):
+        """Test that streaming after an idle period is stamped with the current time"""
+        # Leave the generator's wall anchor a minute stale, as after a long
+        # stretch with no clients
+        data_gen.generate_block(16)
+        data_gen._wall_t0 -= 60.0
+        
+        server = TCPServer(host='127.0.0.1', port=0, physio_model=physio_model, data_gen=data_gen)
+        assert server.start_server()
+        
+        try:
+            port = server.server_socket.getsockname()[1]
+            with socket.create_connection(('127.0.0.1', port), timeout=5.0) as client:
+                reader = _FrameReader(client)
+                for _ in range(100):
+                    kind, frame = reader.read_frame()
+                    if kind == 'json' and 'timestamp' in frame:
+                        break
+                
+                # Within a block period of now, not a minute behind
+                assert abs(frame['timestamp'] - time.time()) < 1.0
+        finally:
+            server.stop_server()
+    
+    def test_oversized_command_disconnects(self, physio_model, data_gen):
+        """Test that a command line over MAX_COMMAND_BYTES closes the connection"""
+        server = TCPServer(host='127.0.0.1', port=0, physio_model=physio_model, data_gen=data_gen)
+        assert server.start_server()
+        
+        try:
+            port = server.server_socket.getsockname()[1]
+            with socket.create_connection(('127.0.0.1', port), timeout=5.0) as client:
+                # No newline, so the server can only buffer it as a partial command
+                client.sendall(b'{' + b' ' * TCPServer.MAX_COMMAND_BYTES)
+                
+                while client.recv(65536):
+                    pass
+                assert not server.clients
+        finally:
+            server.stop_server()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])